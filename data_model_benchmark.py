@@ -0,0 +1,376 @@
+import json
+import os
+import sys
+import time
+import random
+import shutil
+import getopt
+import platform
+import tempfile
+import tracemalloc
+import contextlib
+import collections
+import unittest
+from xml.sax.saxutils import quoteattr, escape
+from data_model_to_openapi import Term, FileSystem, GenerationContext, Architect, create_path, \
+    lets_do_json_schema, lets_do_openapi_yaml, lets_do_datastore, lets_do_render, TOOL_VERSION, \
+    parse_remarks, decode_schema_text
+
+###
+### Synthetic Model
+###
+
+
+schema_remarks = [
+    '<schema>{"format": "free", "possibleValues": ["a", "b"], "defaultValue": "a"}</schema>',
+    '<schema>\nexample: hello\nmaxCardinality: 3\nminCardinality: 0\n</schema>',
+    '<schema>{"validFor": "all", "valueSpecification": {"unit": "ms"}}</schema>',
+    '<schema>\npossibleValues: [FR, DE, IT, ES, BE, NL]\ndefaultValue: FR\n</schema>'
+]
+
+path_operations = ["read-only", "read-create", "read-write", "", "read-create-patch"]
+
+path_parameters = """ <parameters>
+   <get_parameters>{ "in": "query", "name": "expand${TABLE}", "required": false, "schema": {"type": "boolean"} }</get_parameters>
+   <list_parameters>{ "in": "query", "name": "limit", "schema": {"type": "integer"} }, { "in": "query", "name": "offset", "schema": {"type": "integer"} }</list_parameters>
+   <path_parameters>{ "in": "header", "name": "X-Trace", "schema": {"type": "string"} }</path_parameters>
+   <schema_parameters>{ "limitParam": {"name": "limit", "in": "query", "schema": {"type": "integer"}} }</schema_parameters>
+ </parameters>"""
+
+column_types = ["12", "4", "93", "16", "2000", "92", "-5"]  # varchar, integer, timestamp, boolean, object, time, bigint
+
+
+class SyntheticModel:
+    """ SQL Architect model of a given size - same seed, same model """
+
+    def __init__(self, tables : int = 100, columns : int = 10, relationships : int = None,
+                 paths : float = 0.5, schemas : float = 0.3, seed : int = 1):
+        self.tables        = tables
+        self.columns       = columns                                   # per table
+        self.relationships = int(tables * 1.5) if (relationships is None) else relationships
+        self.paths         = paths                                     # share of tables with a _PATH
+        self.schemas       = schemas                                   # share of columns with <schema> remarks
+        self.seed          = seed
+        self.column_id     = 0
+
+    def parameters(self) -> dict:
+        return {"tables": self.tables, "columns": self.columns, "relationships": self.relationships,
+                "paths": self.paths, "schemas": self.schemas, "seed": self.seed}
+
+    def column(self, name : str, column_type : str = "12", nullable : str = "0", physical_name : str = None,
+               default_value : str = "", remarks : str = "") -> str:
+        self.column_id = self.column_id + 1
+        return ('    <column id="COL%d" populated="true" defaultValue=%s name=%s nullable="%s" physicalName=%s precision="0" type="%s" >\n'
+                '     <remarks>%s</remarks>\n    </column>'
+                % (self.column_id, quoteattr(default_value), quoteattr(name), nullable,
+                   quoteattr(physical_name if (physical_name is not None) else name), column_type, escape(remarks)))
+
+    def table(self, table_id : str, name : str, physical_name : str, remarks : str, columns : list) -> list:
+        xml = ['  <table id="%s" populated="true" name=%s objectType="TABLE" physicalName=%s >' % (table_id, quoteattr(name), quoteattr(physical_name)),
+               '   <remarks>%s</remarks>' % escape(remarks),
+               '   <folder id="F%s1" name="Columns" type="1">' % table_id]
+        xml.extend(columns)
+        xml.append('   </folder>')
+        xml.append('   <folder id="F%s3" name="Exported Keys" type="3">\n   </folder>' % table_id)
+        xml.append('   <folder id="F%s4" name="Indices" type="4">\n    <index id="IDX%s" name="pk" physicalName="pk" primaryKeyIndex="true" >\n    </index>\n   </folder>' % (table_id, table_id))
+        xml.append('  </table>')
+        return xml
+
+    def generate(self, name : str) -> str:
+        """ .architect content """
+        rand = random.Random(self.seed)
+        self.column_id = 0
+        xml = ['<?xml version="1.0" encoding="UTF-8"?>',
+               '<architect-project version="1.0" appversion="1.0.9">',
+               ' <project-name>%s</project-name>' % escape(name),
+               ' <target-database id="ppdb" dbcs-ref="DS0">']
+        table_ids = list()
+        for t in range(self.tables):
+            table_id = "TAB%d" % t
+            table_ids.append(table_id)
+            columns = list()
+            for c in range(self.columns):
+                remarks = "Column %d of table %d" % (c, t)
+                if (rand.random() < self.schemas):
+                    remarks = remarks + " " + rand.choice(schema_remarks)
+                columns.append(self.column("Col %d" % c, column_type=column_types[c % len(column_types)], nullable=str(c % 2),
+                                           physical_name="ex%d" % c, default_value=("pattern%d" % c if (c % 2) else "")))
+                columns[-1] = columns[-1].rsplit("<remarks>", 1)[0] + "<remarks>" + escape(remarks) + "</remarks>\n    </column>"
+            if (rand.random() < self.paths):
+                remarks = path_operations[t % len(path_operations)]
+                if (t % 3 == 0):
+                    remarks = remarks + path_parameters
+                columns.append(self.column("_PATH", physical_name="entity%d" % t, default_value="/api/v%d" % (t % 3), remarks=remarks))
+            if (t == 0):
+                columns.append(self.column("_ROOT", remarks="root"))
+            xml.extend(self.table(table_id, "Entity %d" % t, "Entity_%d" % t, "Table %d remarks" % t, columns))
+        # API Information
+        columns = [self.column("title", physical_name="Synthetic API"),
+                   self.column("version", physical_name="1.0.0"),
+                   self.column("description", physical_name="Synthetic", remarks="Synthetic Data Model"),
+                   self.column("servers", remarks='[{"url": "https://localhost"}]')]
+        xml.extend(self.table("TABOA", "OpenAPI", "OpenAPI", "", columns))
+        xml.append('  <relationships>')
+        for r in range(self.relationships):
+            containing, contained = rand.sample(range(self.tables), 2)
+            xml.append('   <relationship id="REL%d" populated="true" fk-table-ref="%s" fkCardinality="%s" name="rel_%d" pk-table-ref="%s" pkCardinality="2" >\n   </relationship>'
+                       % (r, table_ids[contained], rand.choice(["3", "6", "7"]), r, table_ids[containing]))
+        xml.append('  </relationships>')
+        xml.append(' </target-database>')
+        xml.append(' <play-pen zoom="1.0">')
+        for table_id in table_ids:
+            xml.append('  <table-pane table-ref="%s" x="1" y="2" />' % table_id)
+        for r in range(self.relationships):
+            xml.append('  <table-link relationship-ref="REL%d" rLineColor="0x000000" pkLabelText="PK%d" fkLabelText="FK%d" orientation="1"/>' % (r, r, r))
+        xml.append(' </play-pen>')
+        xml.append('</architect-project>')
+        return "\n".join(xml) + "\n"
+
+    def save(self, data_model : str, templates : int = 10):
+        """ data_model.architect, and templates in data_model_templates """
+        FileSystem.saveFileContent(self.generate(os.path.basename(data_model)), data_model + ".architect")
+        FileSystem.createDir(data_model + "_templates")
+        for t in range(templates):
+            FileSystem.saveFileContent(benchmark_template, data_model + "_templates" + os.sep + "artifact%d_Template.txt.mako" % t)
+
+
+benchmark_template = """# ${DATAMODEL}
+% for ENTITY in ENTITIES:
+${ENTITY} : ${ENTITIES[ENTITY]["description"]}
+% for PROP in ENTITIES[ENTITY]["properties"]:
+    ${PROP} ${ENTITIES[ENTITY]["properties"][PROP].get("type", "object")}
+% endfor
+% endfor
+"""
+
+
+###
+### Benchmark
+###
+
+
+class Benchmark:
+    """ Time & peak memory of each generation stage, on a data model.
+    Times are the best of the timed runs, peaks come from one more run under tracemalloc (which slows it down).
+    Each run is cold : the in-process caches and the generated artifacts of the previous run are cleared.
+    """
+
+    STAGES = ["parse", "collect_tables", "collect_links", "resolve_relations", "create_path",
+              "json_schema", "openapi_yaml", "datastore", "render"]
+
+    def __init__(self, data_model : str, render_jobs : int = 1):
+        self.data_model  = data_model
+        self.render_jobs = render_jobs
+        self.stages      = dict()
+
+    def measure(self, stage : str, function, *args):
+        start = time.perf_counter()
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            result = function(*args)
+        self.stages[stage] = {"time": time.perf_counter() - start}
+        if (tracemalloc.is_tracing()):
+            self.stages[stage]["peak"] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.reset_peak()
+        return result
+
+    @staticmethod
+    def clear_caches(output_dir : str):
+        """ Compiled templates, parsed remarks & decoded schemas - and the artifacts, unchanged files are not written again """
+        with FileSystem.templates_cache_lock:
+            FileSystem.templates_cache.clear()
+        parse_remarks.cache_clear()
+        decode_schema_text.cache_clear()
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+    def run_once(self) -> dict:
+        """ All stages, in the order of lets_do_it - from cold caches """
+        self.stages = dict()
+        ctx = GenerationContext(self.data_model)
+        ctx.render_jobs = self.render_jobs
+        Benchmark.clear_caches(ctx.output_dir)
+        FileSystem.createDir(ctx.output_dir)
+        architect = Architect(ctx)
+        # Streaming parse alone, nothing kept - then parse & collect_tables as read_architect does
+        self.measure("parse", collections.deque, architect.iterparse_architect(self.data_model + ".architect"), 0)
+        self.measure("collect_tables", architect.stream_architect, self.data_model + ".architect")
+        self.measure("collect_links", architect.collect_links)
+        self.measure("resolve_relations", architect.resolve_relations)
+        self.measure("create_path", create_path, ctx.entities, dict())
+        self.measure("json_schema", lets_do_json_schema, ctx)
+        self.measure("openapi_yaml", lets_do_openapi_yaml, ctx)
+        self.measure("datastore", lets_do_datastore, ctx, False)
+        self.measure("render", lets_do_render, ctx)
+        return self.stages
+
+    def run(self, repeat : int = 3) -> dict:
+        stages = dict()
+        for run in range(max(repeat, 1)):
+            for stage, measures in self.run_once().items():
+                stages[stage] = min(stages.get(stage, measures), measures, key=lambda measure: measure["time"])
+        tracemalloc.start()
+        try:
+            for stage, measures in self.run_once().items():
+                stages[stage]["peak"] = measures["peak"]
+        finally:
+            tracemalloc.stop()
+        return stages
+
+
+def run_benchmark(model : SyntheticModel, templates : int = 10, repeat : int = 3, render_jobs : int = 1) -> dict:
+    """ Results of the benchmark of a synthetic model """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        data_model = temp_dir + os.sep + "Benchmark"
+        model.save(data_model, templates)
+        stages = Benchmark(data_model, render_jobs).run(repeat)
+    return {
+        "tool_version": TOOL_VERSION,
+        "python":       platform.python_version(),
+        "machine":      platform.machine(),
+        "model":        model.parameters(),
+        "templates":    templates,
+        "repeat":       repeat,
+        "stages":       stages,
+        "total":        sum(stages[stage]["time"] for stage in stages)
+    }
+
+
+# Differences below these are noise, whatever the ratio
+min_differences = {"time": 0.005, "peak": 64 * 1024}
+
+
+def compare(results : dict, baseline : dict, tolerance : float = 0.25) -> list:
+    """ Stages slower, or with a higher peak, than the baseline by more than tolerance """
+    regressions = list()
+    for stage, measures in results["stages"].items():
+        if (stage not in baseline["stages"]): continue
+        for measure in ["time", "peak"]:
+            base = baseline["stages"][stage].get(measure)
+            if (not base) : continue
+            if (measures[measure] > base * (1 + tolerance)) and (measures[measure] - base > min_differences[measure]):
+                regressions.append(stage + " " + measure)
+    return regressions
+
+
+def print_results(results : dict, baseline : dict = None):
+    Term.print_yellow("Model : " + json.dumps(results["model"]) + " - templates : " + str(results["templates"]))
+    Term.print_blue("%-18s %10s %10s %8s %12s" % ("Stage", "Time (ms)", "Base (ms)", "Ratio", "Peak (KB)"))
+    for stage, measures in results["stages"].items():
+        base = baseline["stages"].get(stage, {}).get("time") if (baseline) else None
+        print("%-18s %10.1f %10s %8s %12.0f" % (stage, measures["time"] * 1000,
+                                               "%.1f" % (base * 1000) if (base) else "-",
+                                               "%.2f" % (measures["time"] / base) if (base) else "-",
+                                               measures["peak"] / 1024))
+    Term.print_blue("%-18s %10.1f" % ("Total", results["total"] * 1000))
+
+
+###
+### Tests
+###
+
+
+class Test(unittest.TestCase):
+
+    def testSyntheticModel(self):
+        Term.print_green("> testSyntheticModel")
+        model = SyntheticModel(tables=12, columns=4, paths=1, schemas=1)
+        self.assertEqual(model.generate("Synthetic"), model.generate("Synthetic"))
+        with tempfile.TemporaryDirectory() as temp_dir:
+            model.save(temp_dir + os.sep + "Synthetic", templates=2)
+            ctx = GenerationContext(temp_dir + os.sep + "Synthetic")
+            Architect(ctx).read_architect(ctx.data_model)
+        self.assertEqual(len(ctx.entities), 13)  # With OpenAPI
+        self.assertEqual(len([entity for entity in ctx.entities.values() if ("PATH" in entity)]), 12)
+        Term.print_green("< testSyntheticModel")
+
+    def testBenchmark(self):
+        Term.print_green("> testBenchmark")
+        results = run_benchmark(SyntheticModel(tables=6, columns=3), templates=2, repeat=1)
+        self.assertEqual(list(results["stages"].keys()), Benchmark.STAGES)
+        for measures in results["stages"].values():
+            self.assertGreaterEqual(measures["time"], 0)
+            self.assertGreater(measures["peak"], 0)
+        self.assertEqual(compare(results, results), [])
+        slower = json.loads(json.dumps(results))
+        slower["stages"]["render"]["time"] = results["stages"]["render"]["time"] * 2 + 0.01
+        self.assertEqual(compare(slower, results), ["render time"])
+        # Runs are cold
+        parse_remarks("<path>user</path>")
+        Benchmark.clear_caches(tempfile.gettempdir() + os.sep + "no_benchmark_artifacts")
+        self.assertEqual((parse_remarks.cache_info().currsize, len(FileSystem.templates_cache)), (0, 0))
+        Term.print_green("< testBenchmark")
+
+
+usage = """
+Usage: python data_model_benchmark.py [options]
+
+    Times each generation stage on a synthetic SQL Architect model, with its peak memory.
+
+    -t, --tables <N>         : Tables (default: 100)
+    -c, --columns <N>        : Columns per table (default: 10)
+    -r, --relationships <N>  : Relationships (default: 1.5 per table)
+    -p, --paths <ratio>      : Share of tables with a _PATH (default: 0.5)
+    -s, --schemas <ratio>    : Share of columns with <schema> remarks (default: 0.3)
+    --templates <N>          : Templates rendered (default: 10)
+    -j, --jobs <N>           : Templates rendered in parallel (default: 1)
+    -n, --repeat <N>         : Timed runs, the best is kept (default: 3)
+    -o, --output <file>      : Results file (default: data_model_benchmark.json)
+    -b, --baseline <file>    : Compare with these results - exit 1 if a stage regressed
+    --tolerance <ratio>      : Regression when slower or bigger than the baseline by more than this (default: 0.25)
+    -h, --help               : This help
+"""
+
+
+if __name__ == '__main__':
+    try:
+        opts, args = getopt.gnu_getopt(sys.argv[1:], "ht:c:r:p:s:j:n:o:b:",
+                                       ["help", "tables=", "columns=", "relationships=", "paths=", "schemas=",
+                                        "templates=", "jobs=", "repeat=", "output=", "baseline=", "tolerance="])
+    except getopt.GetoptError as ex:
+        Term.print_error(str(ex))
+        print(usage)
+        sys.exit(2)
+    model       = SyntheticModel()
+    templates   = 10
+    jobs        = 1
+    repeat      = 3
+    output      = "data_model_benchmark.json"
+    baseline    = None
+    tolerance   = 0.25
+    for opt, arg in opts:
+        if opt in ("-h", "--help"):
+            print(usage)
+            sys.exit(0)
+        elif opt in ("-t", "--tables"):
+            model.tables = int(arg)
+            model.relationships = int(model.tables * 1.5)
+        elif opt in ("-c", "--columns"):
+            model.columns = int(arg)
+        elif opt in ("-p", "--paths"):
+            model.paths = float(arg)
+        elif opt in ("-s", "--schemas"):
+            model.schemas = float(arg)
+        elif opt in ("--templates",):
+            templates = int(arg)
+        elif opt in ("-j", "--jobs"):
+            jobs = int(arg)
+        elif opt in ("-n", "--repeat"):
+            repeat = int(arg)
+        elif opt in ("-o", "--output"):
+            output = arg
+        elif opt in ("-b", "--baseline"):
+            baseline = arg
+        elif opt in ("--tolerance",):
+            tolerance = float(arg)
+    for opt, arg in opts:  # After --tables
+        if opt in ("-r", "--relationships"):
+            model.relationships = int(arg)
+    results = run_benchmark(model, templates, repeat, jobs)
+    FileSystem.saveFileContent(json.dumps(results, indent=3), output)
+    baseline_results = json.loads(FileSystem.loadFileContent(baseline)) if (baseline) else None
+    print_results(results, baseline_results)
+    Term.print_blue("Results : " + output)
+    if (baseline_results):
+        regressions = compare(results, baseline_results, tolerance)
+        if (regressions):
+            Term.print_error("Regressions : " + ", ".join(regressions))
+            sys.exit(1)
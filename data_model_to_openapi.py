@@ -1,37 +1,66 @@
-import xmltodict
-import requests
+import xml.etree.ElementTree as ElementTree
 import json
 import copy
 import yaml
-import unittest
 import sys
 import os
 import re
-from jsonschema import validate
 import logging
 import datetime
+import time
+import hashlib
 from termcolor import colored
-import unidecode
 import glob
-from mako.template import Template
-import mako.runtime
-import dicttoxml
-import markdown
-import platform, socket, shutil, errno, getopt
-from jsonpath_ng import jsonpath, parse
+import concurrent.futures
+import functools
+import collections
+import threading
+import tempfile
+import contextlib
+import tracemalloc
+import shutil, getopt, subprocess
+import urllib.parse
+import pickle
+# Loaded by the stages using them, not for every run :
+# - mako       : render
+# - requests   : datastore upload
+# - unidecode  : model reading
+# - xmltodict  : DbSchema models, tests
+# - jsonschema : tests
+# - unittest   : tests, only when run by a test runner
 
 timestamp = datetime.datetime.now().strftime("%y%m%d-%H%M%S")
 logFile   = "."+os.sep+"sql_architect_to_openapi.log"
-logging.basicConfig(filename=logFile, filemode='w', format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', level=logging.DEBUG)
+logFormat = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Off until configured by Term.setLogging (command line : --log-level, --log-file)
+logger = logging.getLogger("sql_architect_to_openapi")
+logger.addHandler(logging.NullHandler())
+logger.setLevel(logging.CRITICAL + 1)
 
 default_data_model = "API_Data_Model_Sample"
 
 input_dir_suffix  = "_templates"
 output_dir_suffix = "_artifacts"
 
-data_model  = "API_Data_Model_Sample"
-input_dir   = "." + os.sep + default_data_model + input_dir_suffix
-output_dir  = "." + os.sep + default_data_model + output_dir_suffix
+cache_file_suffix = "_cache.json"
+model_cache_suffix = "_model.pickle"
+
+CONTEXT_DUMPS = ["yaml", "json"]  # Formats of the rendering context files, <model>_context.<format>
+
+TOOL_VERSION = "1.1.0"  # Caches generated by another version are discarded
+
+yaml_loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)  # libyaml C loader, when available
+yaml_dumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)  # libyaml C dumper, when available
+
+
+class ExpandedDumper(yaml_dumper):
+    """ Shared objects written in full, without &anchors and *aliases """
+
+    def ignore_aliases(self, data):
+        return True
+
+data_model  = "API_Data_Model_Sample"  # Default Data Model, when no GenerationContext is given
 
 ###
 ### Print
@@ -70,55 +99,103 @@ class Term:
         global VERBOSE
         VERBOSE = verbose
 
+    LOG_LEVELS = {"debug": logging.DEBUG, "info": logging.INFO, "warning": logging.WARNING, "error": logging.ERROR, "off": logging.CRITICAL + 1}
+
+    # Current logging settings, for the worker processes
+    log_level = "off"
+    log_file  = None
+
+    @staticmethod
+    def setLogging(level : str = "warning", log_file : str = logFile, mode : str = "w"):
+        """ Log level (debug, info, warning, error, off) & file, the file is only created when something is logged """
+        if (level not in Term.LOG_LEVELS):
+            raise ValueError("Invalid log level [" + str(level) + "], expected one of : " + ", ".join(Term.LOG_LEVELS.keys()))
+        Term.log_level = level
+        Term.log_file  = log_file
+        for handler in list(logger.handlers):
+            if (not isinstance(handler, logging.NullHandler)):
+                logger.removeHandler(handler)
+                handler.close()
+        logger.setLevel(Term.LOG_LEVELS[level])
+        if (level != "off"):
+            handler = logging.FileHandler(log_file, mode=mode, delay=True)
+            handler.setFormatter(logging.Formatter(logFormat))
+            logger.addHandler(handler)
+
+    @staticmethod
+    def getSettings() -> dict:
+        """ Verbose & logging settings, to apply in a worker process with setSettings """
+        return {"verbose": VERBOSE, "log_level": Term.log_level, "log_file": Term.log_file}
+
+    @staticmethod
+    def setSettings(settings : dict):
+        """ Settings of the parent process (getSettings) - the worker appends to the parent log file """
+        Term.setVerbose(settings["verbose"])
+        Term.setLogging(settings["log_level"], settings["log_file"], mode="a")
+
+    @staticmethod
+    def message(text) -> str:
+        """ Messages can be callables, only evaluated when printed or logged """
+        return text() if (callable(text)) else text
+
     @staticmethod
     def print_green(text):
+        text = Term.message(text)
         print(colored(text, "green"))
-        logging.debug(text)
+        logger.debug(text)
 
     @staticmethod
     def print_red(text):
+        text = Term.message(text)
         print(colored(text, "red"))
-        logging.debug(text)
+        logger.debug(text)
 
     @staticmethod
     def print_verbose(text):
-        global VERBOSE
+        if ((not VERBOSE) and (not logger.isEnabledFor(logging.DEBUG))):
+            return
+        text = Term.message(text)
         if (VERBOSE):
             print(colored(text, "magenta"))
-        logging.debug(text)
+        logger.debug(text)
 
     @staticmethod
     def print_error(text, exception : str = None):
+        text = Term.message(text)
         print(colored(text, "red"))
-        logging.error(text)
+        logger.error(text)
         if (exception):
             print(colored(exception, "red"))
-            logging.error(exception)
+            logger.error(exception)
 
     @staticmethod
     def print_warning(text, exception : str = None):
-        global VERBOSE
-        if (VERBOSE):
-            print(colored(text, "cyan"))
-        logging.warning(text)
+        if ((VERBOSE) or (logger.isEnabledFor(logging.WARNING))):
+            text = Term.message(text)
+            if (VERBOSE):
+                print(colored(text, "cyan"))
+            logger.warning(text)
         if (exception):
             print(colored(exception, "red"))
-            logging.warning(exception)
+            logger.warning(exception)
 
     @staticmethod
     def print_yellow(text):
+        text = Term.message(text)
         print(colored(text, "yellow"))
-        logging.debug(text)
+        logger.debug(text)
 
     @staticmethod
     def print_grey(text):
+        text = Term.message(text)
         print(colored(text, "grey"))
-        logging.debug(text)
+        logger.debug(text)
 
     @staticmethod
     def print_blue(text):
+        text = Term.message(text)
         print(colored(text, "blue"))
-        logging.debug(text)
+        logger.debug(text)
 
     @staticmethod
     def print_flat(tree_dict):
@@ -139,7 +216,7 @@ class Term:
     @staticmethod
     def yaml_load(text : str ) -> dict:
         try:
-            return yaml.safe_load(text)
+            return yaml.load(text, Loader=yaml_loader)
         except Exception as ex :
             Term.print_error("Error with decoding YAML :")
             Term.print_error(text)
@@ -150,15 +227,94 @@ class Term:
 ### Directories and Files
 ###
 
+# Read once at import : the umask can only be read by setting it, which races with threads creating files
+files_umask = os.umask(0)
+os.umask(files_umask)
+
 
 class FileSystem:
 
+    # Compiled Mako Templates : (template file, mtime, size) -> Template, least recently used dropped first
+    templates_cache       = collections.OrderedDict()
+    templates_cache_size  = 256
+    templates_cache_lock  = threading.Lock()
+    templates_hits        = 0
+    templates_misses      = 0
+    templates_modules_dir = None  # If set, compiled template modules are also kept on disk, across runs
+
+    # Files written / not written again (same content), by this process & the workers reporting to it
+    files_written   = 0
+    files_unchanged = 0
+    files_lock      = threading.Lock()
+    files_context   = threading.local()  # GenerationContext run by this thread (countingFiles), also counting its files
+    files_mode      = 0o666 & ~files_umask  # Permissions of new files
+
     @staticmethod
-    def saveFileContent(content, file_name: str):
-        with open(file_name, "w") as file:
-            content = file.write(content)
-            file.close()
-        return content
+    def sameFileContent(file_name1 : str, file_name2 : str) -> bool:
+        """ Same size, then same sha1 """
+        try:
+            if (os.path.getsize(file_name1) != os.path.getsize(file_name2)):
+                return False
+        except OSError:
+            return False
+        hashes = list()
+        for file_name in [file_name1, file_name2]:
+            sha1 = hashlib.sha1()
+            with open(file_name, "rb") as file:
+                for block in iter(lambda: file.read(1 << 20), b""):
+                    sha1.update(block)
+            hashes.append(sha1.digest())
+        return hashes[0] == hashes[1]
+
+    @staticmethod
+    def writeFile(file_name : str, write, binary : bool = False) -> bool:
+        """ write(file) to a temporary file next to file_name (opened in binary mode if binary), then :
+        - same content as file_name : the temporary file is removed, file_name & its mtime are kept
+        - otherwise : renamed to file_name, so readers never see a partially written file
+        Returns True if written.
+        """
+        fd, temp_name = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(file_name)), prefix="." + os.path.basename(file_name) + ".", suffix=".tmp")
+        try:
+            with open(fd, "wb" if (binary) else "w") as file:
+                write(file)
+            written = not FileSystem.sameFileContent(temp_name, file_name)
+            if (written):
+                os.chmod(temp_name, (os.stat(file_name).st_mode & 0o7777) if (os.path.exists(file_name)) else FileSystem.files_mode)
+                os.replace(temp_name, file_name)
+            else:
+                os.remove(temp_name)
+        except BaseException:
+            if (os.path.exists(temp_name)):
+                os.remove(temp_name)
+            raise
+        FileSystem.countFiles(1 if (written) else 0, 0 if (written) else 1)
+        return written
+
+    @staticmethod
+    def countFiles(written : int, unchanged : int):
+        with FileSystem.files_lock:
+            FileSystem.files_written   += written
+            FileSystem.files_unchanged += unchanged
+        ctx = getattr(FileSystem.files_context, "ctx", None)
+        if (ctx is not None):
+            ctx.files_written   += written
+            ctx.files_unchanged += unchanged
+
+    @staticmethod
+    @contextlib.contextmanager
+    def countingFiles(ctx):
+        """ Files written by this thread are also counted on ctx, whatever the other threads write """
+        previous = getattr(FileSystem.files_context, "ctx", None)
+        FileSystem.files_context.ctx = ctx
+        try:
+            yield ctx
+        finally:
+            FileSystem.files_context.ctx = previous
+
+    @staticmethod
+    def saveFileContent(content, file_name: str) -> bool:
+        """ Written only if changed, atomically - returns True if written """
+        return FileSystem.writeFile(file_name, lambda file: file.write(content))
 
     @staticmethod
     def get_basename(filename):
@@ -240,6 +396,31 @@ class FileSystem:
             file.close()
         return content
 
+    @staticmethod
+    def getTemplate(p_template_filename : str):
+        """ Compiled Mako Template - compiled again only if the template file changed """
+        from mako.template import Template
+        stat = os.stat(p_template_filename)
+        template_path = os.path.abspath(p_template_filename)
+        key = (template_path, stat.st_mtime_ns, stat.st_size)
+        with FileSystem.templates_cache_lock:
+            template = FileSystem.templates_cache.get(key)
+            if (template is not None):
+                FileSystem.templates_cache.move_to_end(key)
+                FileSystem.templates_hits = FileSystem.templates_hits + 1
+                Term.print_verbose("Template Cache Hit  : [" + p_template_filename + "]")
+                return template
+        # Unique module name per template path, for the on-disk modules directory
+        uri = hashlib.sha1(template_path.encode("utf-8")).hexdigest()[:16] + "_" + FileSystem.get_basename(p_template_filename)
+        template = Template(filename=p_template_filename, uri=uri, module_directory=FileSystem.templates_modules_dir)
+        with FileSystem.templates_cache_lock:
+            FileSystem.templates_cache[key] = template
+            FileSystem.templates_misses = FileSystem.templates_misses + 1
+            while (len(FileSystem.templates_cache) > FileSystem.templates_cache_size):
+                FileSystem.templates_cache.popitem(last=False)
+        Term.print_verbose("Template Cache Miss : [" + p_template_filename + "]")
+        return template
+
     @staticmethod
     def render(p_template_filename : str, p_output_filename, context: dict):
         """" Index HTML file of Regions,Dept, EPCI, Communes """
@@ -247,32 +428,384 @@ class FileSystem:
         p_template_filename = p_template_filename
         p_rendered_filename = p_output_filename
         # Rendering Template
-        template_string = FileSystem.loadFileContent(p_template_filename)
-        "\n".join(template_string.splitlines())
+        import mako.runtime
         mako.runtime.UNDEFINED = 'MISSING_CONTEXT'
-        # temp = Template(filename=p_template_filename)
-        temp = Template(template_string)
+        temp = FileSystem.getTemplate(p_template_filename)
         rendered_template = temp.render(**context)
         # Saving to File
-        f = open(p_rendered_filename, 'w')
-        f.write(rendered_template)
-        f.close()
+        return FileSystem.saveFileContent(rendered_template, p_rendered_filename)
+
+    # Rendering context of a renderDir worker process - received once, when the worker starts
+    render_context = None
 
     @staticmethod
-    def renderDir(p_input_dir : str, p_output_dir : str, context : dict, file_ext: str = ""):
+    def workerInit(templates_modules_dir : str = None, settings : dict = None):
+        """ Worker process start : module globals are not inherited when workers are spawned, they are passed """
+        FileSystem.templates_modules_dir = templates_modules_dir
+        if (settings):
+            Term.setSettings(settings)
+
+    @staticmethod
+    def renderInit(context : dict, templates_modules_dir : str = None, settings : dict = None):
+        FileSystem.render_context = context
+        FileSystem.workerInit(templates_modules_dir, settings)
+
+    @staticmethod
+    def renderWorker(p_template_filename : str, p_rendered_filename : str) -> tuple:
+        """ Render in a worker process - returns the error (None if rendered), the render time, and if the file was written """
+        start = time.perf_counter()
+        try:
+            written = FileSystem.render(p_template_filename, p_rendered_filename, FileSystem.render_context)
+            return None, time.perf_counter() - start, written
+        except Exception as ex:
+            return type(ex).__name__ + " : " + str(ex), time.perf_counter() - start, False
+
+    @staticmethod
+    def renderDir(p_input_dir : str, p_output_dir : str, context : dict, file_ext: str = "", cache = None, jobs : int = 1,
+                  compact_json : bool = False, context_dumps : list = None):
+        """ Render all templates in p_input_dir - with a BuildCache, only templates or context changed since last run.
+        With jobs > 1, templates are rendered in parallel by a pool of jobs processes.
+        A failing template does not stop the others - failures are all reported, then raised.
+        The context is saved in the context_dumps formats (CONTEXT_DUMPS : yaml, json - compact if compact_json),
+        with a BuildCache, only if changed since last run.
+        Returns the render time of each template rendered.
+        """
         template_files = FileSystem.safeListFiles(p_input_dir, file_ext=file_ext, keepExt=True)
         Term.print_yellow ("Rendering Templates Dir : [" + p_input_dir  + "]")
         Term.print_yellow ("Rendering Artifacts Dir : [" + p_output_dir + "]")
-        context_file_yaml = p_output_dir + os.sep + context["DATAMODEL"] + "_context.yaml"
-        context_file_json = p_output_dir + os.sep + context["DATAMODEL"] + "_context.json"
-        Term.print_yellow ("Rendering Context File  : [" + context_file_yaml + "]")
-        Term.print_verbose("Rendering Context : [\n" + yaml.safe_dump(context, indent=2, default_flow_style=False, sort_keys=False) + "\n]")
-        FileSystem.saveFileContent(yaml.safe_dump(context, indent=2, default_flow_style=False, sort_keys=False), context_file_yaml)
-        FileSystem.saveFileContent(json.dumps(context, indent=3), context_file_json)
+        # OPENAPI schemas share their values with ENTITIES : written in full, as in JSON
+        Term.print_verbose(lambda: "Rendering Context : [\n" + Emitter.yaml_text(context, aliases=False) + "\n]")
+        context_hash = BuildCache.hash(Emitter.json_text(context, compact=True)) if (cache) else None
+        for context_dump in (context_dumps if (context_dumps) else []):
+            context_file = p_output_dir + os.sep + context["DATAMODEL"] + "_context." + context_dump
+            dump_hash    = BuildCache.hash(context_hash + context_dump + str(compact_json)) if (cache) else None
+            if (cache) and (cache.get("context", context_dump, dump_hash) is not None) and (FileSystem.is_FileExist(context_file)):
+                Term.print_verbose("Unchanged : [" + context_file + "]")
+                continue
+            Term.print_yellow ("Rendering Context File  : [" + context_file + "]")
+            if (context_dump == "yaml"):
+                Emitter.save_yaml(context, context_file, aliases=False)
+            else:
+                Emitter.save_json(context, context_file, compact=compact_json)
+            if (cache):
+                cache.put("context", context_dump, dump_hash, context_file)
+        renders = list()  # (template_file, template filename, rendered filename, template hash)
         for template_file in template_files:
             p_template_filename = p_input_dir  + os.sep + template_file
             p_rendered_filename = p_output_dir + os.sep + template_file.replace("_Template", "").replace(".mako", "").replace("_mako", "")
-            FileSystem.render(p_template_filename, p_rendered_filename, context)
+            template_hash = None
+            if (cache):
+                template_hash = BuildCache.hash(context_hash + FileSystem.loadFileContent(p_template_filename))
+                if (cache.get("templates", template_file, template_hash) is not None) and (FileSystem.is_FileExist(p_rendered_filename)):
+                    Term.print_verbose("Unchanged : [" + p_template_filename + "]")
+                    continue
+            renders.append((template_file, p_template_filename, p_rendered_filename, template_hash))
+        errors = dict()  # template_file -> error
+        times  = dict()  # template_file -> render time
+        if (jobs is not None) and (jobs > 1) and (len(renders) > 1):
+            with concurrent.futures.ProcessPoolExecutor(max_workers=min(jobs, len(renders)),
+                                                        initializer=FileSystem.renderInit,
+                                                        initargs=(context, FileSystem.templates_modules_dir, Term.getSettings())) as pool:
+                futures = [pool.submit(FileSystem.renderWorker, render[1], render[2]) for render in renders]
+                for render, future in zip(renders, futures):
+                    error, times[render[0]], written = future.result()
+                    if (error): errors[render[0]] = error
+                    elif (written): FileSystem.countFiles(1, 0)
+                    else: FileSystem.countFiles(0, 1)
+        else:
+            for render in renders:
+                start = time.perf_counter()
+                try:
+                    FileSystem.render(render[1], render[2], context)
+                except Exception as ex:
+                    errors[render[0]] = type(ex).__name__ + " : " + str(ex)
+                times[render[0]] = time.perf_counter() - start
+        for template_file, p_template_filename, p_rendered_filename, template_hash in renders:
+            if (template_file in errors):
+                Term.print_error("Rendering Failed : [" + p_template_filename + "]", errors[template_file])
+            elif (cache):
+                cache.put("templates", template_file, template_hash, p_rendered_filename)
+        Term.print_verbose("Templates Cache : " + str(FileSystem.templates_hits) + " hits, " + str(FileSystem.templates_misses) + " misses")
+        if (errors):
+            raise RuntimeError("Rendering Failed : " + str(len(errors)) + "/" + str(len(renders)) + " templates : " + ", ".join(errors.keys()))
+        return times
+
+
+###
+### Emitters
+###
+
+
+class Emitter:
+    """ YAML & JSON output - with the libyaml C dumper when available, streamed to the file (FileSystem.writeFile) """
+
+    @staticmethod
+    def yaml_text(data, aliases : bool = True) -> str:
+        return yaml.dump(data, Dumper=yaml_dumper if (aliases) else ExpandedDumper, indent=2, default_flow_style=False, sort_keys=False)
+
+    @staticmethod
+    def json_text(data, compact : bool = False) -> str:
+        if (compact):
+            return json.dumps(data, separators=(",", ":"))
+        return json.dumps(data, indent=3)
+
+    @staticmethod
+    def save_yaml(data, file_name : str, aliases : bool = True):
+        """ Objects found more than once are &anchored, or written in full each time if not aliases """
+        return FileSystem.writeFile(file_name, lambda file: yaml.dump(data, file, Dumper=yaml_dumper if (aliases) else ExpandedDumper,
+                                                                      indent=2, default_flow_style=False, sort_keys=False))
+
+    @staticmethod
+    def save_json(data, file_name : str, compact : bool = False):
+        """ Indented (3), or compact for machine consumers """
+        if (compact):  # One shot C encoder, faster than streaming
+            return FileSystem.saveFileContent(Emitter.json_text(data, compact=True), file_name)
+        return FileSystem.writeFile(file_name, lambda file: json.dump(data, file, indent=3))
+
+
+###
+### Build Cache
+###
+
+
+class BuildCache:
+    """ Content hashes of tables, relationships, paths & templates, and what was built from them.
+    Saved in <model>_artifacts/<model>_cache.json, so an incremental run only rebuilds what changed.
+    Discarded when the tool version or this script changed : what was built may not be built the same way.
+    """
+
+    SECTIONS = ["tables", "relations", "paths", "templates", "schemas", "context", "openapi"]
+    KEPT     = ["schemas"]  # Sections keeping what was not seen in this run ...
+    KEPT_RUNS = 3           # ... for this number of runs of the section
+
+    def __init__(self, cache_file : str = None):
+        self.cache_file = cache_file
+        self.previous   = {section: dict() for section in BuildCache.SECTIONS}
+        self.current    = {section: dict() for section in BuildCache.SECTIONS}
+        self.rebuilt    = {section: 0 for section in BuildCache.SECTIONS}
+        self.reused     = {section: 0 for section in BuildCache.SECTIONS}
+        self.runs       = {section: 0 for section in BuildCache.SECTIONS}  # Runs of each section, entries record the last run using them
+
+    @staticmethod
+    def hash(content) -> str:
+        """ SHA1 of a text, or of a JSON-able structure """
+        if (not isinstance(content, str)):
+            content = json.dumps(content, sort_keys=True)
+        return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+    def load(self):
+        """ Load previous run hashes - discarded if not readable or from another version """
+        if (not self.cache_file) or (not FileSystem.is_FileExist(self.cache_file)):
+            return self
+        try:
+            cache = json.loads(FileSystem.loadFileContent(self.cache_file))
+        except Exception as ex:
+            Term.print_warning("Build Cache Ignored : " + self.cache_file, str(ex))
+            return self
+        if (cache.get("version") != TOOL_VERSION):
+            Term.print_warning("Build Cache Ignored (version " + str(cache.get("version")) + ") : " + self.cache_file)
+            return self
+        if (cache.get("script") != ModelCache.script_hash()):
+            Term.print_warning("Build Cache Ignored (script changed) : " + self.cache_file)
+            return self
+        for section in BuildCache.SECTIONS:
+            self.previous[section] = cache.get(section, dict())
+            self.runs[section]     = cache.get("runs", dict()).get(section, 0)
+        return self
+
+    def save(self):
+        """ Save this run hashes - what was not seen in this run is dropped """
+        if (not self.cache_file):
+            return
+        cache = {"version": TOOL_VERSION, "script": ModelCache.script_hash(), "runs": self.runs}
+        for section in BuildCache.SECTIONS:
+            # Sections not run this time (watch mode render only) are kept
+            cache[section] = self.current[section] if (self.current[section]) else self.previous[section]
+            if (section in BuildCache.KEPT):
+                cache[section] = self.kept(section)
+        FileSystem.saveFileContent(json.dumps(cache, separators=(",", ":")), self.cache_file)
+
+    def kept(self, section : str) -> dict:
+        """ Entries of a KEPT section used in its last KEPT_RUNS runs """
+        entries = {**self.previous[section], **self.current[section]}
+        return {key: entry for key, entry in entries.items() if (entry.get("run", 0) > self.runs[section] - BuildCache.KEPT_RUNS)}
+
+    def start_run(self, sections : list = None):
+        """ Start a new run in the same process (watch mode) : what the last run built becomes previous """
+        for section in (sections if sections else BuildCache.SECTIONS):
+            if (section in BuildCache.KEPT):
+                self.previous[section] = self.kept(section)
+                self.current[section]  = dict()
+            elif (self.current[section]):
+                self.previous[section] = self.current[section]
+                self.current[section]  = dict()
+            self.runs[section] = self.runs[section] + 1
+        self.rebuilt = {section: 0 for section in BuildCache.SECTIONS}
+        self.reused  = {section: 0 for section in BuildCache.SECTIONS}
+        return self
+
+    def get(self, section : str, key : str, content_hash : str):
+        """ What was built from key last time, if its content hash is unchanged - else None """
+        entry = self.previous[section].get(key)
+        if (entry is None) or (entry["hash"] != content_hash):
+            self.rebuilt[section] = self.rebuilt[section] + 1
+            return None
+        self.reused[section] = self.reused[section] + 1
+        self.current[section][key] = {**entry, "run": self.runs[section]}
+        return json.loads(entry["value"])
+
+    def put(self, section : str, key : str, content_hash : str, value):
+        """ Record what was built from key - returned as a fresh copy by get() in the next run.
+        Only what is the same once reloaded from JSON (no YAML dates, int keys ...) : the rest is built again.
+        """
+        try:
+            text = json.dumps(value, separators=(",", ":"))
+        except (TypeError, ValueError) as ex:
+            Term.print_warning("Not Cached : " + section + " " + str(key), str(ex))
+            return
+        if (json.loads(text) != value):
+            Term.print_verbose(lambda: "Not Cached (not the same from JSON) : " + section + " " + str(key))
+            return
+        self.current[section][key] = {"hash": content_hash, "value": text, "run": self.runs[section]}
+
+    def report(self):
+        counts = list()
+        for section in BuildCache.SECTIONS:
+            total = self.rebuilt[section] + self.reused[section]
+            if (total == 0) : continue
+            counts.append(section + " " + str(self.rebuilt[section]) + "/" + str(total))
+        Term.print_blue("Rebuilt : " + ", ".join(counts))
+
+
+###
+### Model Cache
+###
+
+
+class ModelCache:
+    """ Model read from the .architect (entities, links & schema parameters, with their relations resolved),
+    pickled in <model>_artifacts/<model>_model.pickle, after a first line with its key. Loaded instead of reading the .architect again while
+    the .architect, the tool version and this script are unchanged. Opt-in (--model-cache) : the key only detects stale
+    caches, it does not authenticate the file - anyone who can write the pickle file can run code when it is loaded.
+    """
+
+    def __init__(self, cache_file : str):
+        self.cache_file = cache_file
+
+    @staticmethod
+    @functools.lru_cache(maxsize=1)
+    def script_hash() -> str:
+        with open(os.path.abspath(__file__), "rb") as file:
+            return hashlib.sha1(file.read()).hexdigest()
+
+    @staticmethod
+    def key(model_file : str) -> str:
+        """ SHA1 of the model file, tool version & script """
+        sha1 = hashlib.sha1((TOOL_VERSION + ":" + ModelCache.script_hash() + ":").encode("utf-8"))
+        with open(model_file, "rb") as file:
+            for block in iter(lambda: file.read(1 << 20), b""):
+                sha1.update(block)
+        return sha1.hexdigest()
+
+    def load(self, key : str):
+        """ The cached model (dict) if saved with this key - else None. The model is only unpickled if the key matches """
+        if (not FileSystem.is_FileExist(self.cache_file)):
+            return None
+        try:
+            with open(self.cache_file, "rb") as file:
+                if (file.readline(len(key) + 1) != (key + "\n").encode("ascii")):
+                    return None
+                model = pickle.load(file)
+        except Exception as ex:
+            Term.print_warning("Model Cache Ignored : " + self.cache_file, str(ex))
+            return None
+        return model if (isinstance(model, dict)) else None
+
+    def save(self, key : str, model : dict):
+        def write(file):
+            file.write((key + "\n").encode("ascii"))
+            pickle.dump(model, file, protocol=pickle.HIGHEST_PROTOCOL)
+        try:
+            FileSystem.writeFile(self.cache_file, write, binary=True)
+        except (pickle.PicklingError, TypeError, AttributeError) as ex:
+            Term.print_warning("Model Not Cached : " + self.cache_file, str(ex))
+
+
+###
+### Profiling
+###
+
+
+class Profiler:
+    """ Wall time, CPU time & peak traced allocation of the generation stages (--profile).
+    Stages can be nested, the peak of a stage includes its sub-stages. Allocations are traced
+    with tracemalloc, which slows the run down : compare stage times with each other, not with unprofiled runs.
+    """
+
+    def __init__(self, stats_file : str = None):
+        self.stats_file = stats_file  # cProfile stats of the whole run, if set
+        self.stages     = list()      # [name, depth, wall, cpu, peak], in start order
+        self.templates  = dict()      # template -> render time
+        self.running    = list()      # Stages started, not ended
+        self.profile    = None
+        self.tracing    = False       # Allocations traced by this profiler - not if already traced by the caller
+
+    def start(self):
+        self.stages    = list()
+        self.templates = dict()
+        self.running   = list()
+        self.tracing   = not tracemalloc.is_tracing()
+        if (self.tracing):
+            tracemalloc.start()
+        if (self.stats_file):
+            import cProfile
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+
+    def stop(self):
+        if (self.profile):
+            self.profile.disable()
+            self.profile.dump_stats(self.stats_file)
+            self.profile = None
+        if (self.tracing):
+            tracemalloc.stop()
+            self.tracing = False
+
+    @contextlib.contextmanager
+    def stage(self, name : str):
+        if (self.running):
+            self.running[-1][4] = max(self.running[-1][4], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        record = [name, len(self.running), time.perf_counter(), time.process_time(), 0]
+        self.stages.append(record)
+        self.running.append(record)
+        try:
+            yield record
+        finally:
+            self.running.pop()
+            record[2] = time.perf_counter() - record[2]
+            record[3] = time.process_time() - record[3]
+            record[4] = max(record[4], tracemalloc.get_traced_memory()[1])
+            if (self.running):
+                self.running[-1][4] = max(self.running[-1][4], record[4])
+
+    def report(self, slowest_templates : int = 10):
+        Term.print_blue("%-32s %10s %10s %12s" % ("Stage", "Wall (ms)", "CPU (ms)", "Peak (KB)"))
+        for name, depth, wall, cpu, peak in self.stages:
+            print("%-32s %10.1f %10.1f %12.0f" % ("  " * depth + name, wall * 1000, cpu * 1000, peak / 1024))
+        if (self.templates):
+            Term.print_blue("%-43s %10s" % ("Slowest Templates (" + str(len(self.templates)) + " rendered)", "Wall (ms)"))
+            for template in sorted(self.templates, key=self.templates.get, reverse=True)[:slowest_templates]:
+                print("%-43s %10.1f" % (template, self.templates[template] * 1000))
+        if (self.stats_file):
+            Term.print_blue("Profile Stats : " + self.stats_file + " (python -m pstats " + self.stats_file + ")")
+
+
+def profile_stage(ctx, name : str):
+    """ Profiled stage of the ctx generation - nothing if not profiled """
+    if (ctx is None) or (ctx.profiler is None):
+        return contextlib.nullcontext()
+    return ctx.profiler.stage(name)
 
 
 ###
@@ -280,7 +813,7 @@ class FileSystem:
 ###
 
 def find_between(content, start, end):
-    found = re.search(start + '([\s\S]*?)' + end, content)
+    found = re.search(start + r'([\s\S]*?)' + end, content)
     if (found is None): return None
     found = found.group(1)
     found = re.sub(start, "", found)
@@ -290,266 +823,227 @@ def find_between(content, start, end):
 
 def remove_between(content, start, end):
     if (not content): return ""
-    found = re.sub(start + '([\s\S]*?)' + end, "", content)
+    found = re.sub(start + r'([\s\S]*?)' + end, "", content)
     return found
 
 
+class Remarks:
+    """ <tag> </tag> of a remarks text, located in one pass over the text.
+    find() and remove() give the same results as find_between() and remove_between().
+    """
+
+    TAGS = ["schema", "parameters", "path_parameters", "list_parameters", "get_parameters", "post_parameters",
+            "put_parameters", "patch_parameters", "delete_parameters", "schema_parameters"]
+
+    PATTERN = re.compile(r"<(/?)(" + "|".join(TAGS) + r")>")
+
+    def __init__(self, text : str):
+        self.text   = text if (text) else ""
+        self.opens  = collections.defaultdict(list)  # tag -> [(start, end)] of <tag>
+        self.closes = collections.defaultdict(list)  # tag -> [(start, end)] of </tag>
+        for match in Remarks.PATTERN.finditer(self.text):
+            tags = self.closes if (match.group(1)) else self.opens
+            tags[match.group(2)].append(match.span())
+
+    def next_close(self, tag : str, position : int):
+        for close in self.closes[tag]:
+            if (close[0] >= position): return close
+        return None
+
+    def find(self, tag : str) -> str:
+        """ Text in the first <tag> </tag> - None if none """
+        if (tag not in Remarks.TAGS):
+            return find_between(self.text, "<" + tag + ">", "</" + tag + ">")
+        if (not self.opens[tag]) : return None
+        start = self.opens[tag][0]
+        close = self.next_close(tag, start[1])
+        if (close is None) : return None
+        return self.text[start[1]:close[0]].replace("<" + tag + ">", "")
+
+    def remove(self, tag : str) -> str:
+        """ Text without all <tag> </tag> """
+        if (tag not in Remarks.TAGS):
+            return remove_between(self.text, "<" + tag + ">", "</" + tag + ">")
+        kept = list()
+        position = 0
+        for start in self.opens[tag]:
+            if (start[0] < position) : continue
+            close = self.next_close(tag, start[1])
+            if (close is None) : break
+            kept.append(self.text[position:start[0]])
+            position = close[1]
+        kept.append(self.text[position:])
+        return "".join(kept)
+
+
+@functools.lru_cache(maxsize=4096)
+def parse_remarks(text : str) -> Remarks:
+    """ Remarks of text - parsed once per distinct text """
+    return Remarks(text)
+
+
 ###
 ### Path Generation
 ###
 
 
 def get_parameters(text, prefix) -> str :
-    found = find_between(text.strip(), "<"+prefix+">", "</"+prefix+">")
+    found = parse_remarks(text).find(prefix)
     if (found): return found
     return None
 
 
-paths_template_list_create_prefix  = """
-        "${PATH_PREFIX}/${PATH}s": {
-            "summary": "Path used to manage the list of ${table}s.",
-            "description": "The REST endpoint/path used to list and create zero or more `${TABLE}`.  This path contains a `GET` and `POST` operation to perform the list and create tasks, respectively."
-"""
+def paths_template_list_create_prefix(table : str) -> dict:
+    return {
+        "summary": "Path used to manage the list of " + table.lower() + "s.",
+        "description": "The REST endpoint/path used to list and create zero or more `" + table + "`.  This path contains a `GET` and `POST` operation to perform the list and create tasks, respectively."
+    }
 
 
-def paths_template_list(parameters : str = None) -> str:
-    if ((parameters) and (parameters.strip() == "")): parameters = None
-    if (not parameters):
-        parameters = ""
-    else:
-        parameters = "\"parameters\" : [  " + parameters + " ] , "
-
-    paths_template_list = """
-                "get": {
-                    "operationId": "get${TABLE}s",
-                    "summary": "List All ${TABLE}s",
-                    "description": "Gets a list of all `${TABLE}` entities.",
-                    """ + parameters + """
-                    "responses": {
-                        "200": {
-                            "content": {
-                                "application/json": {
-                                    "schema": {
-                                        "type": "array",
-                                        "items": {
-                                            "$ref": "#/components/schemas/${TABLE}"
-                                        }
-                                    }
-                                }
-                            },
-                            "description": "Successful response - returns an array of `${TABLE}` entities."
-                        }
+def paths_template_schema(table : str) -> dict:
+    return {
+        "$ref": "#/components/schemas/" + table
+    }
+
+
+def paths_template_operation(operation_id : str, summary : str, description : str, parameters : list = None) -> dict:
+    operation = {
+        "operationId": operation_id,
+        "summary": summary,
+        "description": description
+    }
+    if (parameters):
+        operation["parameters"] = parameters
+    return operation
+
+
+def paths_template_list(table : str, parameters : list = None) -> dict:
+    paths_template_list = paths_template_operation("get" + table + "s", "List All " + table + "s", "Gets a list of all `" + table + "` entities.", parameters)
+    paths_template_list["responses"] = {
+        "200": {
+            "content": {
+                "application/json": {
+                    "schema": {
+                        "type": "array",
+                        "items": paths_template_schema(table)
                     }
                 }
-    """
+            },
+            "description": "Successful response - returns an array of `" + table + "` entities."
+        }
+    }
     return paths_template_list
 
 
-body_content = """
-                        "content": {
-                            "application/json": {
-                                "schema": {
-                                    "$ref": "#/components/schemas/${TABLE}"
-                                }
-                            }
-                        },
-                        "required": true
-"""
-
-
-def paths_template_create(parameters : str = None) -> str:
-    if ((parameters) and (parameters.strip() == "")): parameters = None
-    if (not parameters):
-        parameters = ""
-    else:
-        parameters = "\"parameters\" : [  " + parameters + " ] , "
-    paths_template_create = """
-                "post": {
-                    "operationId": "create${TABLE}",
-                    "summary": "Create a ${TABLE}",
-                    "description": "Creates a new instance of a `${TABLE}`.",
-                    """ + parameters + """
-                    "requestBody": {
-                        "description": "A new `${TABLE}` to be created.",
-                        "content": {
-                            "application/json": {
-                                    "schema": {
-                                        "$ref": "#/components/schemas/${TABLE}"
-                                    }
-                            }
-                        },
-                        "required": true
-                    },
-                    "responses": {
-                        "202": {
-                            "description": "Successful response.",
-                            "content": {
-                                "application/json": {
-                                    "schema": {
-                                        "$ref": "#/components/schemas/${TABLE}"
-                                    }
-                                  }
-                            }
-                        }
-                    }
+def paths_template_create(table : str, parameters : list = None) -> dict:
+    paths_template_create = paths_template_operation("create" + table, "Create a " + table, "Creates a new instance of a `" + table + "`.", parameters)
+    paths_template_create["requestBody"] = {
+        "description": "A new `" + table + "` to be created.",
+        "content": {
+            "application/json": {
+                "schema": paths_template_schema(table)
+            }
+        },
+        "required": True
+    }
+    paths_template_create["responses"] = {
+        "202": {
+            "description": "Successful response.",
+            "content": {
+                "application/json": {
+                    "schema": paths_template_schema(table)
                 }
-    """
+            }
+        }
+    }
     return paths_template_create
 
 
-paths_template_read_write_prefix = """
-
-        "${PATH_PREFIX}/${PATH}s/{${PATH}Id}": {
-            "summary": "Path used to manage a single ${TABLE}.",
-            "description": "The REST endpoint/path used to get, update, and delete single instances of an `${TABLE}`.  This path contains `GET`, `PUT`, and `DELETE` operations used to perform the get, update, and delete tasks, respectively."
-"""
+def paths_template_read_write_prefix(table : str) -> dict:
+    return {
+        "summary": "Path used to manage a single " + table + ".",
+        "description": "The REST endpoint/path used to get, update, and delete single instances of an `" + table + "`.  This path contains `GET`, `PUT`, and `DELETE` operations used to perform the get, update, and delete tasks, respectively."
+    }
 
 
-def paths_template_get(parameters : str = None) -> str:
-    if ((parameters) and (parameters.strip() == "")): parameters = None
-    if (not parameters):
-        parameters = ""
-    else:
-        parameters = "\"parameters\" : [  " + parameters + " ] , "
-    paths_template_get = """
-                "get": {
-                    "operationId": "get${TABLE}",
-                    "summary": "Get a ${TABLE}",
-                    "description": "Gets the details of a single instance of a `${TABLE}`.",
-                    """ + parameters + """
-                    "responses": {
-                        "200": {
-                            "content": {
-                                "application/json": {
-                                    "schema": {
-                                        "$ref": "#/components/schemas/${TABLE}"
-                                    }
-                                }
-                            },
-                            "description": "Successful response - returns a single `${TABLE}`."
-                        }
-                    }
+def paths_template_get(table : str, parameters : list = None) -> dict:
+    paths_template_get = paths_template_operation("get" + table, "Get a " + table, "Gets the details of a single instance of a `" + table + "`.", parameters)
+    paths_template_get["responses"] = {
+        "200": {
+            "content": {
+                "application/json": {
+                    "schema": paths_template_schema(table)
                 }
-    """
+            },
+            "description": "Successful response - returns a single `" + table + "`."
+        }
+    }
     return paths_template_get
 
 
-def paths_template_put(parameters : str = None) -> str:
-    if ((parameters) and (parameters.strip() == "")): parameters = None
-    if (not parameters):
-        parameters = ""
-    else:
-        parameters = "\"parameters\" : [  " + parameters + " ] , "
-    paths_template_put = """
-                "put": {
-                    "operationId": "update${TABLE}",
-                    "summary": "Update a ${TABLE}",
-                    "description": "Updates an existing `${TABLE}`.",
-                    """ + parameters + """
-                    "requestBody": {
-                        "description": "Updated `${TABLE}` information.",
-                        "content": {
-                            "application/json": {
-                                "schema": {
-                                    "$ref": "#/components/schemas/${TABLE}"
-                                }
-                            }
-                        },
-                        "required": true
-                    },
-                    "responses": {
-                        "202": {
-                            "description": "Successful response."
-                        }
-                    }
-                }
-    """
+def paths_template_put(table : str, parameters : list = None) -> dict:
+    paths_template_put = paths_template_operation("update" + table, "Update a " + table, "Updates an existing `" + table + "`.", parameters)
+    paths_template_put["requestBody"] = {
+        "description": "Updated `" + table + "` information.",
+        "content": {
+            "application/json": {
+                "schema": paths_template_schema(table)
+            }
+        },
+        "required": True
+    }
+    paths_template_put["responses"] = {
+        "202": {
+            "description": "Successful response."
+        }
+    }
     return paths_template_put
 
 
-"""
-                                "schema": {
-                                    "$ref": "#/components/schemas/${TABLE}"
-                                }
-"""
-
-
-def paths_template_patch(parameters : str = None) -> str:
-    if ((parameters) and (parameters.strip() == "")): parameters = None
-    if (not parameters):
-        parameters = ""
-    else:
-        parameters = "\"parameters\" : [  " + parameters + " ] , "
-    paths_template_patch = """
-                "patch": {
-                    "operationId": "update${TABLE}",
-                    "summary": "Update a ${TABLE}",
-                    "description": "Updates an existing `${TABLE}`.",
-                    """ + parameters + """
-                    "requestBody": {
-                        "description": "Updated `${TABLE}` information.",
-                        "content": {
-                            "application/json": {
-                                "schema": {
-                                    "$ref": "#/components/schemas/${TABLE}"
-                                }
-                            }
-                        },
-                        "required": true
-                    },
-                    "responses": {
-                        "202": {
-                            "description": "Successful response.",
-                            "content": {
-                                "application/json": {
-                                    "schema": {
-                                        "$ref": "#/components/schemas/${TABLE}"
-                                     }
-                                  }
-                            }
-                        }
-                    }
+def paths_template_patch(table : str, parameters : list = None) -> dict:
+    paths_template_patch = paths_template_operation("update" + table, "Update a " + table, "Updates an existing `" + table + "`.", parameters)
+    paths_template_patch["requestBody"] = {
+        "description": "Updated `" + table + "` information.",
+        "content": {
+            "application/json": {
+                "schema": paths_template_schema(table)
+            }
+        },
+        "required": True
+    }
+    paths_template_patch["responses"] = {
+        "202": {
+            "description": "Successful response.",
+            "content": {
+                "application/json": {
+                    "schema": paths_template_schema(table)
                 }
-    """
+            }
+        }
+    }
     return paths_template_patch
 
 
-def paths_template_delete(parameters : str = None) -> str:
-    if ((parameters) and (parameters.strip() == "")): parameters = None
-    if (not parameters):
-        parameters = ""
-    else:
-        parameters = "\"parameters\" : [  " + parameters + " ] , "
-    paths_template_delete = """
-                "delete": {
-                    "operationId": "delete${TABLE}",
-                    "summary": "Delete a ${TABLE}",
-                    "description": "Deletes an existing `${TABLE}`.",
-                    """ + parameters + """
-                    "responses": {
-                        "204": {
-                            "description": "Successful response."
-                        }
-                    }
-                }
-    """
+def paths_template_delete(table : str, parameters : list = None) -> dict:
+    paths_template_delete = paths_template_operation("delete" + table, "Delete a " + table, "Deletes an existing `" + table + "`.", parameters)
+    paths_template_delete["responses"] = {
+        "204": {
+            "description": "Successful response."
+        }
+    }
     return paths_template_delete
 
 
-def paths_template_parameters() -> str:
-
-    paths_template_parameters = """            
-                    {
-                        "name": "${PATH}Id",
-                        "description": "A unique identifier for a `${TABLE}`.",
-                        "schema": {
-                            "type": "string"
-                        },
-                        "in": "path",
-                        "required": true
-                    }
-    """
-    return paths_template_parameters
+def paths_template_parameters(path : str, table : str) -> dict:
+    return {
+        "name": path + "Id",
+        "description": "A unique identifier for a `" + table + "`.",
+        "schema": {
+            "type": "string"
+        },
+        "in": "path",
+        "required": True
+    }
 
 
 def paths_table(path : str, table: str, path_prefix: str = "", p_paths_template=""):
@@ -560,61 +1054,84 @@ def paths_table(path : str, table: str, path_prefix: str = "", p_paths_template=
     return l_paths_template
 
 
-def create_path(entities):
-    global schema_parameters
-    f_paths_template = ""
-    sep = ""
+def paths_parameters(table : str, entity : dict, tag : str) -> list:
+    """ Parameters list in the <tag> of the entity PATH_PARAMETERS - None if none.
+    ${PATH_PREFIX}, ${TABLE}, ${PATH} and ${table} are replaced before decoding.
+    """
+    if ("PATH_PARAMETERS" not in entity) : return None
+    parameters = get_parameters(entity["PATH_PARAMETERS"], tag)
+    if (not parameters) or (parameters.strip() == "") : return None
+    parameters = paths_table(entity["PATH"], table, path_prefix=entity["PATH_PREFIX"], p_paths_template=parameters)
+    try:
+        return json.loads("[" + parameters + "]")
+    except ValueError as ex:
+        Term.print_error("Error with decoding <" + tag + "> of [" + table + "] :", parameters.strip())
+        raise ValueError("Invalid <" + tag + "> of [" + table + "] : " + str(ex)) from ex
+
+
+def create_path(entities, schema_parameters : dict) -> dict:
+    """ Paths for the _PATH entities - <schema_parameters> are added to schema_parameters """
+    paths = dict()
     for entity in entities:
         if ("PATH" in entities[entity]):
-            path_par = None
-            path_parameters = None
-            list_par = None
-            get_par = None
-            create_par = None
-            patch_par = None
-            put_par = None
-            del_par = None
+            path      = entities[entity]["PATH"]
+            prefix    = entities[entity]["PATH_PREFIX"]
+            operation = entities[entity]["PATH_OPERATION"].lower()
+
             schema_par = None
             if ("PATH_PARAMETERS" in entities[entity]) :
-                path_par   = get_parameters(entities[entity]["PATH_PARAMETERS"], "path_parameters")
-                list_par   = get_parameters(entities[entity]["PATH_PARAMETERS"], "list_parameters")
-                get_par    = get_parameters(entities[entity]["PATH_PARAMETERS"], "get_parameters")
-                create_par = get_parameters(entities[entity]["PATH_PARAMETERS"], "post_parameters")
-                patch_par  = get_parameters(entities[entity]["PATH_PARAMETERS"], "patch_parameters")
-                put_par    = get_parameters(entities[entity]["PATH_PARAMETERS"], "put_parameters")
-                del_par    = get_parameters(entities[entity]["PATH_PARAMETERS"], "delete_parameters")
                 schema_par = get_parameters(entities[entity]["PATH_PARAMETERS"], "schema_parameters")
-
             if (schema_par and schema_par.strip() != "") :
                 schema_params = Term.json_load(schema_par)
                 for param in schema_params:
                     schema_parameters[param] = schema_params[param]
-            if (not path_par or path_par.strip() == "") :
-                path_par = ""
-                path_parameters = "\"parameters\": [" + paths_template_parameters() + "]"
-            else:
-                path_parameters = "\"parameters\": [" + paths_template_parameters() + "," + path_par + "]"
-                path_par = " , \"parameters\": [" + path_par + "]"
-
-            if ("read-only" in entities[entity]["PATH_OPERATION"].lower()):
-                l_paths_template = paths_template_list_create_prefix + "," + paths_template_list(list_par) + path_par + " } ,"
-                l_paths_template = l_paths_template + paths_template_read_write_prefix + "," + path_parameters + "," + paths_template_get(get_par)  + " }"
-            elif ("read-create" in entities[entity]["PATH_OPERATION"].lower()):
-                l_paths_template = paths_template_list_create_prefix + "," + paths_template_list(list_par) + "," + paths_template_create(create_par) + path_par + " } ,"
-                l_paths_template = l_paths_template + paths_template_read_write_prefix + "," + path_parameters + "," + paths_template_get(get_par) + " } "
-            elif ("read-create-patch" in entities[entity]["PATH_OPERATION"].lower()):
-                l_paths_template = paths_template_list_create_prefix + "," + paths_template_list(list_par) + "," + paths_template_create(create_par)  + path_par + " } ,"
-                l_paths_template = l_paths_template + paths_template_read_write_prefix + "," + path_parameters + "," + paths_template_get(get_par) + "," + paths_template_patch(patch_par) + " } "
-            else:  # "read-write"
-                l_paths_template = paths_template_list_create_prefix + "," + paths_template_list(list_par) + "," + paths_template_create(create_par) + path_par + " } ,"
-                l_paths_template = l_paths_template + paths_template_read_write_prefix + "," + path_parameters + "," + paths_template_get(get_par) + "," + paths_template_put(put_par) + "," + paths_template_delete(del_par) + " } "
 
-            path   = entities[entity]["PATH"]
-            prefix = entities[entity]["PATH_PREFIX"]
-            f_paths_template = f_paths_template + sep + paths_table(path, entity, path_prefix=prefix, p_paths_template=l_paths_template)
-            sep = ", "
-    Term.print_verbose(f_paths_template)
-    return f_paths_template
+            list_path = paths_template_list_create_prefix(entity)
+            item_path = paths_template_read_write_prefix(entity)
+            item_path["parameters"] = [paths_template_parameters(path, entity)] + (paths_parameters(entity, entities[entity], "path_parameters") or [])
+            list_path["get"] = paths_template_list(entity, paths_parameters(entity, entities[entity], "list_parameters"))
+            item_path["get"] = paths_template_get(entity,  paths_parameters(entity, entities[entity], "get_parameters"))
+            if ("read-only" in operation):
+                pass
+            elif ("read-create" in operation):
+                list_path["post"]   = paths_template_create(entity, paths_parameters(entity, entities[entity], "post_parameters"))
+            elif ("read-create-patch" in operation):  # Not reached - matches "read-create" above
+                list_path["post"]   = paths_template_create(entity, paths_parameters(entity, entities[entity], "post_parameters"))
+                item_path["patch"]  = paths_template_patch(entity,  paths_parameters(entity, entities[entity], "patch_parameters"))
+            else:  # "read-write"
+                list_path["post"]   = paths_template_create(entity, paths_parameters(entity, entities[entity], "post_parameters"))
+                item_path["put"]    = paths_template_put(entity,    paths_parameters(entity, entities[entity], "put_parameters"))
+                item_path["delete"] = paths_template_delete(entity, paths_parameters(entity, entities[entity], "delete_parameters"))
+            path_par = paths_parameters(entity, entities[entity], "path_parameters")
+            if (path_par):
+                list_path["parameters"] = path_par
+
+            paths[prefix + "/" + path + "s"] = list_path
+            paths[prefix + "/" + path + "s/{" + path + "Id}"] = item_path
+    Term.print_verbose(lambda: json.dumps(paths, indent=3))
+    return paths
+
+
+def create_path_incremental(entities, schema_parameters : dict, cache) -> dict:
+    """ Paths for each _PATH entity, reused from the cache when the entity path definition is unchanged """
+    paths = dict()
+    for entity in entities:
+        if ("PATH" not in entities[entity]) : continue
+        path_definition = [entity] + [entities[entity].get(key) for key in ["PATH", "PATH_PREFIX", "PATH_OPERATION", "PATH_PARAMETERS"]]
+        path_hash = BuildCache.hash(path_definition)
+        entity_paths = cache.get("paths", entity, path_hash)
+        if (entity_paths is None):
+            entity_paths = dict()
+            entity_paths["paths"] = create_path({entity: entities[entity]}, dict())
+            entity_paths["parameters"] = dict()
+            if ("PATH_PARAMETERS" in entities[entity]):
+                schema_par = get_parameters(entities[entity]["PATH_PARAMETERS"], "schema_parameters")
+                if (schema_par and schema_par.strip() != ""):
+                    entity_paths["parameters"] = Term.json_load(schema_par)
+            cache.put("paths", entity, path_hash, entity_paths)
+        paths.update(entity_paths["paths"])
+        schema_parameters.update(entity_paths["parameters"])
+    return paths
 
 
 ###
@@ -624,34 +1141,54 @@ def create_path(entities):
 def set_default(attribute : str, desc : dict, prop : str, default) -> dict:
     if ((prop not in desc) or (str(desc[prop]).strip() == "")):
         desc[prop] = default
-        Term.print_warning("Warning : attribute [" + str(attribute) + "] " + str(prop) + " defaulted to : [" + str(default) + "]")
+        # One per defaulted attribute key : debug, not to be formatted or logged at the default log level
+        Term.print_verbose(lambda: "Default : attribute [" + str(attribute) + "] " + str(prop) + " defaulted to : [" + str(default) + "]")
     return desc
 
 
-def decode_prop_schema(prop: str, schema: str, description: str = None, key : str = "schema") -> dict:
+@functools.lru_cache(maxsize=1024)
+def decode_schema_text(schema : str):
+    """ Decoded <schema> text - decoded once per distinct text, never to be modified """
+    try:
+        if schema.startswith("{"):  # JSON
+            return Term.json_load(schema)
+        elif schema.startswith("\""):  # JSON
+            return Term.json_load("{" + schema + "}")
+        elif (schema == ""):  # JSON
+            return dict()
+        else:  # YAML
+            return Term.yaml_load(schema)
+    except Exception as e:
+        Term.print_error(schema, str(e))
+        return dict()
+
+
+def decode_schema(schema : str, cache = None):
+    """ Fresh copy of the decoded <schema> text - with a BuildCache, also reused from the previous runs """
+    schema_hash = None
+    if (cache):
+        schema_hash = BuildCache.hash(schema)
+        desc_schema = cache.get("schemas", schema_hash, schema_hash)
+        if (desc_schema is not None): return desc_schema
+    desc_schema = copy.deepcopy(decode_schema_text(schema))
+    if (cache):
+        cache.put("schemas", schema_hash, schema_hash, desc_schema)
+    return desc_schema
+
+
+def decode_prop_schema(prop: str, schema: str, description: str = None, key : str = "schema", cache = None) -> dict:
     """ Decode for JSON Schema in <schema> </schema>
     - schema is the text to be decoded
     - prop is used to refer to the related property in error messages
     - description will be used as default is not in schema
+    - cache is the BuildCache of decoded schemas, if any
     """
     desc_schema = dict()
-    if (find_between(schema, "<"+key+">", "</"+key+">")):
-        schema = find_between(schema, "<"+key+">", "</"+key+">")
-        schema = schema.strip()
-        try:
-            if schema.startswith("{"):  # JSON
-                desc_schema = Term.json_load(schema)
-            elif schema.startswith("\""):  # JSON
-                desc_schema = Term.json_load("{" + schema + "}")
-            elif (schema == ""):  # JSON
-                desc_schema = dict()
-            else:  # YAML
-                desc_schema = Term.yaml_load(schema)
-        except Exception as e:
-                Term.print_error(schema, str(e))
-                desc_schema = dict()
-
-    description = remove_between(description, "<"+key+">", "</"+key+">")
+    found = parse_remarks(schema).find(key)
+    if (found):
+        desc_schema = decode_schema(found.strip(), cache)
+
+    description = parse_remarks(description).remove(key)
     if (not description or description.strip() == ""):
         description = "No Description"
 
@@ -666,11 +1203,11 @@ def decode_prop_schema(prop: str, schema: str, description: str = None, key : st
     return desc_schema
 
 
-def check_as_parameter(desc, desc_schema):
+def check_as_parameter(desc, desc_schema, schema_parameters : dict):
     """ Check if this desc_schema property should be set as a global schema parameter and create it if necessary
     - description will be used as default is not in schema
+    - schema_parameters is where the parameter is added
     """
-    global schema_parameters
     if ("asParameter" in desc_schema):
         param_desc = dict()
         param_desc["name"] = desc_schema["name"]
@@ -715,11 +1252,60 @@ limitParam:       # Can be referenced as '#/components/parameters/limitParam'
 
 
 def clean_name(name: str) -> str:
+    import unidecode
     return unidecode.unidecode(name.strip()).replace(" ", "_").replace("\\", "_").replace("'", "_").replace("/", "-").replace("_fk", "")
 
 
-def find_entity(entities, entity_name):
+class ModelIndex:
+    """ Lookup tables over entities & links, built once after parsing instead of scanning on each find """
+
+    def __init__(self, p_entities : dict, p_links : dict):
+        self.entities       = p_entities
+        self.links          = p_links
+        self.table_names    = dict()  # Table ID -> Entity Name
+        self.entity_names   = dict()  # NAME / name -> Entity
+        self.contained      = dict()  # Containing Table (ID, or Name once resolved) -> Links
+        self.cardinalities  = dict()  # (Containing Table, Contained Table) -> Cardinality
+        self.index_entities()
+        self.index_links()
+        self.index_relations()
+
+    def index_entities(self):
+        self.table_names  = dict()
+        self.entity_names = dict()
+        for entity in self.entities.values():
+            if ("TABLE" in entity) : self.table_names.setdefault(entity["TABLE"], entity["NAME"])
+            if ("NAME" in entity)  : self.entity_names.setdefault(entity["NAME"], entity)
+            if ("name" in entity)  : self.entity_names.setdefault(entity["name"], entity)
+
+    def index_links(self):
+        self.contained = dict()
+        for link in self.links.values():
+            self.contained.setdefault(link["TableContaining"], list()).append(link)
+
+    def index_relations(self):
+        self.cardinalities = dict()
+        for entity in self.entities:
+            for rel in self.entities[entity]["RELATIONS"].values():
+                self.cardinalities.setdefault((entity, rel["TableContained"]), rel["Cardinalite"])
+
+    def find_table_name(self, table_id):
+        return self.table_names.get(table_id)
+
+    def find_entity(self, entity_name):
+        return self.entity_names.get(entity_name)
+
+    def find_table_contained(self, table_containing) -> list:
+        return list(self.contained.get(table_containing, []))
+
+    def find_table_cardinality(self, table_containing, table_contained) -> str:
+        return self.cardinalities.get((table_containing, table_contained))
+
+
+def find_entity(entities, entity_name, index : ModelIndex = None):
     """ Return Entity by Name """
+    if (index) and (index.entities is entities):
+        return index.find_entity(entity_name)
     for entity in entities.keys():
         if (("NAME" in entities[entity]) and (entities[entity]["NAME"] == entity_name)):
             return entities[entity]
@@ -728,8 +1314,10 @@ def find_entity(entities, entity_name):
     return None
 
 
-def find_table_contained(links, table_containing) -> list:
+def find_table_contained(links, table_containing, index : ModelIndex = None) -> list:
     """ Return Contained Tables for a specified Containing Table """
+    if (index) and (index.links is links):
+        return index.find_table_contained(table_containing)
     lks = []
     for link in links:
         if (links[link]["TableContaining"] == table_containing):
@@ -737,20 +1325,22 @@ def find_table_contained(links, table_containing) -> list:
     return lks
 
 
-def find_table_contained_names(table_containing) -> list:
+def find_table_contained_names(ctx, table_containing) -> list:
     """ Return Contained Tables for a specified Containing Table """
-    lks = find_table_contained(links, table_containing)
+    lks = find_table_contained(ctx.links, table_containing, ctx.model_index)
     tables = list()
     for lk in lks :
         tables.append(lk["TableContained"])
     return tables
 
 
-def find_table_cardinatilty(table_containing, table_contained) -> str:
+def find_table_cardinatilty(ctx, table_containing, table_contained) -> str:
     """ Return Contained Tables for a specified Containing Table """
-    for rel in entities[table_containing]["RELATIONS"]:
-        if (entities[table_containing]["RELATIONS"][rel]["TableContained"] == table_contained):
-            return entities[table_containing]["RELATIONS"][rel]["Cardinalite"]
+    if (ctx.model_index) and (ctx.model_index.entities is ctx.entities):
+        return ctx.model_index.find_table_cardinality(table_containing, table_contained)
+    for rel in ctx.entities[table_containing]["RELATIONS"]:
+        if (ctx.entities[table_containing]["RELATIONS"][rel]["TableContained"] == table_contained):
+            return ctx.entities[table_containing]["RELATIONS"][rel]["Cardinalite"]
     return None
 
 """
@@ -763,11 +1353,50 @@ See ReadMe File
 """
 
 
-# Objects of Interest
-openapi           = {}
-entities          = {}
-links             = {}
-schema_parameters = {}   # To OpenAPI Objects
+# GenerationContext options shared by all the models of a batch - render_jobs & profiler are per run
+GENERATION_OPTIONS = ["compact_json", "schema_defs", "datastore", "model_cache", "context_dumps", "openapi_split"]
+
+
+class GenerationContext:
+    """ Model & outputs of one generation - generations with their own context can run in the same process """
+
+    def __init__(self, p_data_model : str = default_data_model):
+        self.data_model  = p_data_model
+        self.input_dir   = p_data_model + input_dir_suffix
+        self.output_dir  = p_data_model + output_dir_suffix
+        self.build_cache = None  # BuildCache, in incremental / watch mode - kept across runs
+        self.render_jobs = 1     # Templates rendered in parallel
+        self.compact_json = False  # JSON files without indentation, for machine consumers
+        self.schema_defs = "inline"  # $defs of the root JSON schemas : inline, reachable or shared (SCHEMA_DEFS_MODES)
+        self.datastore   = None  # DatastoreUploader of the datastore stage (default : DatastoreUploader())
+        self.model_cache = False   # Model read from the .architect kept in a ModelCache, loaded while the .architect is unchanged
+        self.context_dumps = list()  # Rendering context saved in these formats (CONTEXT_DUMPS), none by default
+        self.openapi_split = False  # OpenAPI in a root document, a file per schema & per path group (save_openapi_split)
+        self.profiler    = None  # Profiler, to time the stages
+        self.reset()
+
+    def reset(self):
+        """ Forget the model read by a previous run """
+        # Objects of Interest
+        self.openapi           = {}
+        self.entities          = {}
+        self.links             = {}
+        self.schema_parameters = {}    # To OpenAPI Objects
+        self.schemas           = {}    # JSON Schemas
+        self.model_index       = None  # ModelIndex over entities & links, once read
+        self.files_written     = 0     # Output files written by the last run
+        self.files_unchanged   = 0     # Output files with the same content, not written again
+
+    def set_options(self, options : dict = None):
+        """ Generation options (compact_json, schema_defs, ...), e.g. from the command line - each batch model gets its own copy """
+        for option, value in (options if (options) else dict()).items():
+            if (option not in GENERATION_OPTIONS):
+                raise ValueError("Invalid generation option [" + str(option) + "], expected one of : " + ", ".join(GENERATION_OPTIONS))
+            setattr(self, option, copy.deepcopy(value))
+        return self
+
+    def get_basename(self) -> str:
+        return FileSystem.get_basename(self.data_model)
 
 """
                                 Architect                              DbSchema
@@ -810,29 +1439,59 @@ Link:
 
 class Architect:
 
-    def __init__(self):
-        self.architect = None
-        self.tables    = dict()  # From SQL Architect
-        self.relations = dict()  # From SQL Architect
+    # Elements streamed out of the Architect file, by location
+    STREAMED = {
+        "architect-project/target-database/table"                      : "table",
+        "architect-project/target-database/relationships/relationship" : "relationship",
+        "architect-project/play-pen/table-link"                        : "table-link",
+    }
+
+    def __init__(self, ctx : GenerationContext = None):
+        self.ctx         = ctx if (ctx) else GenerationContext()
+        self.architect   = None
+        self.tables      = list()  # From SQL Architect
+        self.relations   = list()  # From SQL Architect
+        self.table_links = list()  # From SQL Architect Play Pen
+        self.grey_links  = set()   # Relationship IDs drawn in Grey
 
     def find_table_name(self, table_id):
-        global entities, links
+        entities = self.ctx.entities
+        if (self.ctx.model_index) and (self.ctx.model_index.entities is entities):
+            return self.ctx.model_index.find_table_name(table_id)
         for table in entities.keys():
             if (entities[table]["TABLE"] == table_id):
                 return entities[table]["NAME"]
         return None
 
+    def index_table_links(self) -> dict:
+        """ Relationship ID -> Table Link (labels, line color), and the Grey Links to ignore, in one pass """
+        tlinks = dict()
+        self.grey_links = set()
+        for tlink in self.table_links:
+            tlinks[tlink["@relationship-ref"]] = tlink
+            if (tlink["@rLineColor"] == "0x999999"):
+                self.grey_links.add(tlink["@relationship-ref"])
+        return tlinks
+
     def collect_links(self):
         """ Scan for all Links / Relationships  and their Attributes in the Architect Data Model """
-        global entities, links
-        if isinstance(self.relations, dict) :
-            self.relations = [self.relations]
+        build_cache = self.ctx.build_cache
+        tlinks = self.index_table_links()
         for relation in self.relations:
+            if (build_cache):
+                # Only tracked for the rebuilt report, relations are resolved on each run
+                relation_hash = BuildCache.hash([relation, tlinks.get(relation["@id"])])
+                if (build_cache.get("relations", relation["@id"], relation_hash) is None):
+                    build_cache.put("relations", relation["@id"], relation_hash, None)
             link = dict()
             if ("ignore" in relation["@name"]) :
                 # Ignore starting with ignore (or Grey Links)
                 Term.print_verbose("Relation Ignored (ignore in name) : "+clean_name(relation["@name"]))
                 continue
+            if (relation["@id"] in self.grey_links) :
+                # Ignore Grey Links (or starting with ignore)
+                Term.print_verbose("Relation Ignored (grey color) : " + clean_name(relation["@name"]))
+                continue
             link["TableContaining"] = relation["@pk-table-ref"]   # find_table_name(relation["@pk-table-ref"])
             link["TableContained"]  = relation["@fk-table-ref"]   # find_table_name(relation["@fk-table-ref"])
             if   (relation["@fkCardinality"] == "3") :  link["Cardinalite"]     = "ZeroToOne"
@@ -844,18 +1503,11 @@ class Architect:
             # elif (relation["@pkCardinality"] == "2") :  link["Cardinalite"]     = "OneToOne"
             link["Name"]            = clean_name(relation["@name"])
             link["Description"]     = "No Description"
-            ignore = False
-            for tlink in self.architect["architect-project"]["play-pen"]["table-link"]:
-                if (tlink["@rLineColor"] == "0x999999"):
-                    # Ignore Grey Links (or starting with ignore)
-                    Term.print_verbose("Relation Ignored (grey color) : " + clean_name(relation["@name"]))
-                    ignore = True
-                    continue
-                if (tlink["@relationship-ref"] == relation["@id"]):
-                    link["Description"] = clean_name(tlink["@pkLabelText"]) + " " + clean_name(tlink["@fkLabelText"])
-                    if (link["Description"] == " "): link["Description"] = link["Name"]
-                if (ignore is False) :
-                    links[relation["@id"]] = link
+            if (relation["@id"] in tlinks):
+                tlink = tlinks[relation["@id"]]
+                link["Description"] = clean_name(tlink["@pkLabelText"]) + " " + clean_name(tlink["@fkLabelText"])
+                if (link["Description"] == " "): link["Description"] = link["Name"]
+            self.ctx.links[relation["@id"]] = link
 
     def handle_object(self, table):
         """ Extract Data from Architect Table for Object Descriptors """
@@ -866,12 +1518,12 @@ class Architect:
         # remarks -> description
         if (table["remarks"] is None):
             table["remarks"] = ""
-        obj_desc["description"] = remove_between(table["remarks"], "<schema>", "</schema>").strip()
+        obj_desc["description"] = parse_remarks(table["remarks"]).remove("schema").strip()
         if (obj_desc["description"] == "") :
             obj_desc["description"] = "No Description for " + name
 
         # remarks : we may have a <schema> </schema> with property description
-        desc_schema = decode_prop_schema(None, table["remarks"], key="schema")
+        desc_schema = decode_prop_schema(None, table["remarks"], key="schema", cache=self.ctx.build_cache)
         desc_schema = set_default(name, desc_schema, "key", False)
         desc_schema = set_default(name, desc_schema, "validationScript", "")
         desc_schema = set_default(name, desc_schema, "example", "")
@@ -904,21 +1556,22 @@ class Architect:
             obj_desc["PATH_PREFIX"] = att["@defaultValue"]  # This is the route path prefix
             obj_desc["PATH_OPERATION"] = "READ-WRITE"
             if (att["remarks"] is not None):
-                parameters = find_between(att["remarks"], "<parameters>", "</parameters>")
+                remarks    = parse_remarks(att["remarks"])
+                parameters = remarks.find("parameters")
                 if (parameters):
                     obj_desc["PATH_PARAMETERS"] = parameters
-                    att["remarks"] = remove_between(att["remarks"], "<parameters>", "</parameters>")
+                    att["remarks"] = remarks.remove("parameters")
                 obj_desc["PATH_OPERATION"]  = att["remarks"]
 
         # remarks -> description
         if (att["remarks"] is None):
             att["remarks"] = ""
-        att_property["description"] = remove_between(att["remarks"], "<schema>", "</schema>").strip()
+        att_property["description"] = parse_remarks(att["remarks"]).remove("schema").strip()
         if (att_property["description"] == "") :
             att_property["description"] = "No Description for " + att["@name"]
 
         # remarks : we may have a <schema> </schema> with property description
-        desc_schema =  decode_prop_schema(att_name, att["remarks"], key="schema")
+        desc_schema =  decode_prop_schema(att_name, att["remarks"], key="schema", cache=self.ctx.build_cache)
         desc_schema = set_default(att_name, desc_schema, "key", False)
         desc_schema = set_default(att_name, desc_schema, "validationScript", "")
         desc_schema = set_default(att_name, desc_schema, "valueSpecification", "")
@@ -981,58 +1634,137 @@ class Architect:
 
         return obj_desc, att_name
 
-    def collect_tables(self):
+    def collect_table(self, table):
+        """ Scan one Table and its Attributes in the Architect Data Model - reused from the build cache if unchanged """
+        entities    = self.ctx.entities
+        build_cache = self.ctx.build_cache
+        if (build_cache):
+            table_hash = BuildCache.hash(table)
+            cached = build_cache.get("tables", table["@id"], table_hash)
+            if (cached is not None):
+                if (cached["entity"]) : entities[cached["name"]] = cached["entity"]
+                return
+            data_type, entity_name = self.handle_table(table)
+            build_cache.put("tables", table["@id"], table_hash, {"name": entity_name, "entity": data_type})
+        else:
+            data_type, entity_name = self.handle_table(table)
+        if (data_type) : entities[entity_name] = data_type
+
+    def handle_table(self, table):
+        """ Extract Data from Architect Table and its Attributes - None if ignored """
+        data_type, entity_name = self.handle_object(table)
+        if ("ignore" in data_type["example"]) :
+            Term.print_verbose("Table Ignored (ignore in example/physicalName) : " + clean_name(entity_name))
+            return None, entity_name
+        for folder in table["folder"]:
+            if ("index" in folder):
+                if ("index-column" not in folder["index"]): continue
+                for index_col in folder["index"]["index-column"]:
+                    data_type["primary_key"] = folder["index"]["index-column"]["@physicalName"]
+            if "column" not in folder: continue
+            column = folder["column"]
+            if isinstance(column, list):
+                for col in column:
+                    data_type, att_name = self.handle_attribute(data_type, col)
+            else:
+                data_type, att_name = self.handle_attribute(data_type, column)
+        return data_type, entity_name
+
+    def collect_tables(self, tables = None):
         """ Scan for all Tables and their Attributes in the Architect Data Model """
-        global entities, links
-        for table in self.tables:
-            data_type, entity_name = self.handle_object(table)
-            if ("ignore" in data_type["example"]) :
-                Term.print_verbose("Table Ignored (ignore in example/physicalName) : " + clean_name(entity_name))
+        for table in (self.tables if tables is None else tables):
+            self.collect_table(table)
+
+    @staticmethod
+    def element_to_dict(element):
+        """ Convert an XML Element to the same layout as xmltodict (@attributes, child tags, #text) """
+        node = {"@" + key: value for key, value in element.attrib.items()}
+        for child in element:
+            value = Architect.element_to_dict(child)
+            if (child.tag not in node):
+                node[child.tag] = value
+            elif isinstance(node[child.tag], list):
+                node[child.tag].append(value)
+            else:
+                node[child.tag] = [node[child.tag], value]
+        text = element.text.strip() if (element.text) else ""
+        if (not node):
+            return text if (text != "") else None
+        if (text != ""):
+            node["#text"] = text
+        return node
+
+    def iterparse_architect(self, architect_file : str):
+        """ Stream the Architect file : yield (kind, element) for each table, relationship and table-link.
+        Each element is discarded once consumed, memory is bounded by one table, not by the whole file.
+        """
+        ancestors = list()
+        for event, element in ElementTree.iterparse(architect_file, events=("start", "end")):
+            if (event == "start"):
+                ancestors.append(element)
                 continue
-            for folder in table["folder"]:
-                if ("index" in folder):
-                    if ("index-column" not in folder["index"]): continue
-                    for index_col in folder["index"]["index-column"]:
-                        data_type["primary_key"] = folder["index"]["index-column"]["@physicalName"]
-                if "column" not in folder: continue
-                column = folder["column"]
-                if isinstance(column, list):
-                    for col in column:
-                        data_type, att_name = self.handle_attribute(data_type, col)
-                else:
-                    data_type, att_name = self.handle_attribute(data_type, column)
-            entities[entity_name] = data_type
+            ancestors.pop()
+            location = "/".join([ancestor.tag for ancestor in ancestors] + [element.tag])
+            kind = Architect.STREAMED.get(location)
+            if (kind):
+                yield kind, Architect.element_to_dict(element)
+            if (ancestors and (kind or len(ancestors) <= 2)):
+                # Consumed, or done with a top-level section
+                ancestors[-1].remove(element)
 
     def read_architect(self, data_model : str):
         """ Read and Scan Architect Data Model """
         Term.print_yellow("> read_architect")
-        global entities, links
+        entities = self.ctx.entities
+        links    = self.ctx.links
 
-        # Reading architect file
-        myFile = open(data_model + ".architect", "r")
-        architectSchema = myFile.read()
-        myFile.close()
-        self.architect = xmltodict.parse(architectSchema)
+        # Streaming architect file - tables are collected as they are read
+        with profile_stage(self.ctx, "parse & collect_tables"):
+            self.stream_architect(data_model + ".architect")
 
-        # Save to JSON Format
-        # FileSystem.saveFileContent(json.dumps(self.architect, indent=3), data_model + ".json")
-        Term.print_verbose("architect : \n" + json.dumps(self.architect, indent=3))
-
-        # Collecting architect entities
-        self.tables    = self.architect["architect-project"]["target-database"]["table"]
-        self.relations = self.architect["architect-project"]["target-database"]["relationships"]["relationship"]
-        self.collect_links()
-        self.collect_tables()
+        # Collecting architect links
+        with profile_stage(self.ctx, "collect_links"):
+            self.collect_links()
 
         # Replacing Table IDs by Names & Creating Sub-Relationships
+        with profile_stage(self.ctx, "resolve_relations"):
+            self.resolve_relations()
+
+        # What did we get ?
+        Term.print_verbose(lambda: "relations : " + str(self.relations))
+        Term.print_verbose(lambda: "tlinks    : " + str(self.table_links))
+        Term.print_verbose(lambda: "entities  : " + str(entities))
+        Term.print_verbose(lambda: "links     : " + str(links))
+
+        Term.print_yellow("< read_architect")
+        return entities, links
+
+    def stream_architect(self, file_name : str):
+        """ Collect the tables as they are read, keep the relationships & table links for later """
+        self.relations   = list()
+        self.table_links = list()
+        for kind, element in self.iterparse_architect(file_name):
+            if (kind == "table"):
+                self.collect_table(element)
+            elif (kind == "relationship"):
+                self.relations.append(element)
+            elif (kind == "table-link"):
+                self.table_links.append(element)
+
+    def resolve_relations(self):
+        """ Replace Table IDs by Names in the collected links, and add the contained entities as properties """
+        entities = self.ctx.entities
+        links    = self.ctx.links
+        model_index = self.ctx.model_index = ModelIndex(entities, links)
         for entity in entities:
-            for rel in find_table_contained(links, entities[entity]["TABLE"]):
-                if (not self.find_table_name(rel["TableContained"])):
+            for rel in model_index.find_table_contained(entities[entity]["TABLE"]):
+                contained_name = model_index.find_table_name(rel["TableContained"])
+                if (not contained_name):
                     continue
                 rel["TableContenanteID"] = rel["TableContaining"]
                 rel["TableContenueID"]   = rel["TableContained"]
-                rel["TableContaining"]   = self.find_table_name(rel["TableContaining"])
-                rel["TableContained"]     = self.find_table_name(rel["TableContained"])
+                rel["TableContaining"]   = model_index.find_table_name(rel["TableContaining"])
+                rel["TableContained"]    = contained_name
                 entities[entity]["RELATIONS"][rel["Name"]] = rel
                 this_property = dict()
                 this_property["description"] = rel["Description"]
@@ -1044,28 +1776,24 @@ class Architect:
                     this_property["items"]["$ref"] = "#/components/schemas/" + rel["TableContained"]
                 entities[entity]["properties"][rel["TableContained"]] = this_property
 
-        # What did we get ?
-        Term.print_verbose("tables    : " + str(self.tables))
-        Term.print_verbose("relations : " + str(self.relations))
-        Term.print_verbose("entities  : " + str(entities))
-        Term.print_verbose("links     : " + str(links))
-
-        Term.print_yellow("< read_architect")
-        return entities, links
+        # Links now refer to Table Names
+        model_index.index_links()
+        model_index.index_relations()
 
 
 """
 
 class DbSchema:
 
-    def __init__(self):
+    def __init__(self, ctx : GenerationContext = None):
+        self.ctx      = ctx if (ctx) else GenerationContext()
         self.tables   = dict()
 
     def log(self):
-        global entities, links
-        Term.print_verbose("tables    : " + str(self.tables))
-        Term.print_verbose("entities  : " + str(entities))
-        Term.print_verbose("links     : " + str(links))
+        entities, links = self.ctx.entities, self.ctx.links
+        Term.print_verbose(lambda: "tables    : " + str(self.tables))
+        Term.print_verbose(lambda: "entities  : " + str(entities))
+        Term.print_verbose(lambda: "links     : " + str(links))
         return
 
     def handle_table(self, table):
@@ -1104,9 +1832,10 @@ class DbSchema:
             data_type["PATH_PREFIX"]     = att["defo"]     if ("defo" in att)    else "/"+clean_name(entity_name).lower()
             if ("comment" in att) :
                 desc  = att["comment"]
-                found = find_between(desc, "<parameters>", "</parameters>")
+                remarks = parse_remarks(desc)
+                found   = remarks.find("parameters")
                 if (found):
-                    desc = remove_between(desc, "<parameters>", "</parameters>")
+                    desc = remarks.remove("parameters")
                     data_type["PATH_PARAMETERS"] = found
                 data_type["PATH_OPERATION"]  = desc
             else:
@@ -1157,7 +1886,7 @@ class DbSchema:
         # "@to_table"   : "Service",
         # "@type"       : "Identifying",
         # "comment"     : "Service Owner"
-        global entities, links
+        entities, links = self.ctx.entities, self.ctx.links
         link = dict()
         if ("ignore" in relation["@name"]) :
             # Ignore  Links with ignore
@@ -1181,7 +1910,7 @@ class DbSchema:
         return data_type, name
 
     def collect_entities_links(self):
-        global entities, links
+        entities, links = self.ctx.entities, self.ctx.links
         for table in self.tables:
             Term.print_verbose(table)
             data_type, entity_name = self.handle_table(table)
@@ -1217,16 +1946,17 @@ class DbSchema:
 
     def read_dbschema(self, data_model : str):
         Term.print_yellow("> read_dbschema")
-        global entities, links
+        entities, links = self.ctx.entities, self.ctx.links
 
         # Reading dbschema file
         myFile = open(data_model + ".dbs", "r")
         dbschemaContent = myFile.read()
         myFile.close()
+        import xmltodict
         dict_schema = xmltodict.parse(dbschemaContent)
 
         # Save to JSON Format
-        FileSystem.saveFileContent(json.dumps(dict_schema, indent=3), data_model + ".json")
+        Emitter.save_json(dict_schema, data_model + ".json")
 
         # Collecting Table & Links
         self.tables = dict_schema["project"]["schema"]["table"]
@@ -1245,9 +1975,10 @@ class DbSchema:
 
 
 """
-def lets_do_dbschema(data_model : str):
+def lets_do_dbschema(ctx : GenerationContext):
     Term.print_yellow("> lets_do_dbschema")
-    data_model = re.sub(".*\\" + os.sep , "", data_model)
+    entities, links = ctx.entities, ctx.links
+    data_model = ctx.get_basename()
     xml =       "<?xml version=\"1.0\" encoding=\"UTF-8\" ?>"
     xml = xml + "   <project name=\""+data_model+"\" id=\"Project-2cc\" database=\""+"LogicalDesign"+"\" >"
     xml = xml + "       <schema name=\""+data_model+"\" >"
@@ -1296,7 +2027,7 @@ def lets_do_dbschema(data_model : str):
         xml = xml + "<entity schema=\"NEF_Business_Model\" name=\""+entity+"\"  color=\"3986C1\" x=\""+str(x)+"\" y=\""+str(y)+"\"/>\n"
     xml = xml + "   </layout>\n"
     xml = xml + "</project>\n"
-    dbs_file = data_model + ".dbs"
+    dbs_file = ctx.data_model + ".dbs"
     FileSystem.saveFileContent(xml, dbs_file)
     Term.print_yellow("< lets_do_dbschema")
     return xml
@@ -1313,15 +2044,42 @@ def get_entity_property_value(p_entity : dict, p_property: str) -> str :
     return None
 
 
-def lets_do_openapi_yaml():
-    global data_model, input_dir, output_dir, openapi
+###
+### Model Projections
+###
+
+# Bookkeeping of the model entities, not in the generated schemas
+ENTITY_INTERNAL_KEYS = ["TABLE", "RELATIONS", "NAME", "prepend", "append", "options", "PATH_OPERATION", "PATH_PARAMETERS", "PATH_PREFIX", "PATH"]
+
+
+def project_entities(entities : dict, entity_keys : list, properties_keys : list = None, property_keys : list = None) -> dict:
+    """ View of the entities for an emitter, without the entity_keys of each entity :
+    - properties_keys / property_keys : also without these properties / keys of each property, in new dicts
+    - None : properties shared with entities
+    Only the new entity, properties & property dicts may be modified, what is below is shared with entities.
+    """
+    projection = dict()
+    for entity in entities:
+        entity_desc = {key: value for key, value in entities[entity].items() if (key not in entity_keys)}
+        if ((properties_keys is not None) or (property_keys is not None)) and ("properties" in entity_desc):
+            properties = entity_desc["properties"]
+            entity_desc["properties"] = {prop: {key: value for key, value in properties[prop].items() if (key not in (property_keys or []))}
+                                         for prop in properties if (prop not in (properties_keys or []))}
+        projection[entity] = entity_desc
+    return projection
+
 
+def lets_do_openapi_yaml(ctx : GenerationContext):
     """ Created Openapi Yaml from Data Model """
     Term.print_yellow("> lets_do_openapi Yaml API")
-    global entities, links, schema_parameters
+    entities          = ctx.entities
+    schema_parameters = ctx.schema_parameters
 
     # Create API Operations
-    paths = Term.json_load("{" + create_path(entities) + "}")
+    if (ctx.build_cache):
+        paths = create_path_incremental(entities, schema_parameters, ctx.build_cache)
+    else:
+        paths = create_path(entities, schema_parameters)
 
     # Info Data / Default Values
     open_api_yaml = dict()
@@ -1370,34 +2128,18 @@ def lets_do_openapi_yaml():
             open_api_yaml["components"] = dict()
             open_api_yaml["components"]["securitySchemes"] = securitySchemes
 
-        openapi = open_api_yaml
+        ctx.openapi = open_api_yaml
         del entities["OpenAPI"]
+        if (ctx.model_index) : ctx.model_index.index_entities()
 
-    # Clean-up before generation
-    entities_yaml = copy.deepcopy(entities)
+    # Schemas : entities without bookkeeping
+    entities_yaml = project_entities(entities, ENTITY_INTERNAL_KEYS + ["_ROOT", "name", "mandatory"],
+                                     properties_keys=["name", "mandatory", "_ROOT"], property_keys=["name", "mandatory"])
     for entity in entities_yaml:
-        if ("TABLE" in entities_yaml[entity])     : del entities_yaml[entity]["TABLE"]
-        if ("RELATIONS" in entities_yaml[entity]) : del entities_yaml[entity]["RELATIONS"]
-        if ("NAME" in entities_yaml[entity])      : del entities_yaml[entity]["NAME"]
-        if ("prepend" in entities_yaml[entity])   : del entities_yaml[entity]["prepend"]
-        if ("append" in entities_yaml[entity])    : del entities_yaml[entity]["append"]
-        if ("options" in entities_yaml[entity])   : del entities_yaml[entity]["options"]
-        if ("PATH_OPERATION" in entities_yaml[entity]):  del entities_yaml[entity]["PATH_OPERATION"]
-        if ("PATH_PARAMETERS" in entities_yaml[entity]): del entities_yaml[entity]["PATH_PARAMETERS"]
-        if ("PATH_PREFIX" in entities_yaml[entity]):     del entities_yaml[entity]["PATH_PREFIX"]
-        if ("PATH"  in entities_yaml[entity]):           del entities_yaml[entity]["PATH"]
-        if ("_ROOT" in entities_yaml[entity]):           del entities_yaml[entity]["_ROOT"]
-        if ("name" in entities_yaml[entity]) :           del entities_yaml[entity]["name"]
-        if ("mandatory" in entities_yaml[entity]) :      del entities_yaml[entity]["mandatory"]
         if ("properties" in entities_yaml[entity]) :
-            if ("name" in entities_yaml[entity]["properties"]):           del entities_yaml[entity]["properties"]["name"]
-            if ("mandatory" in entities_yaml[entity]["properties"]):      del entities_yaml[entity]["properties"]["mandatory"]
-            if ("_ROOT" in entities_yaml[entity]["properties"]):          del entities_yaml[entity]["properties"]["_ROOT"]
             for prop in entities_yaml[entity]["properties"] :
-                if ("name" in entities_yaml[entity]["properties"][prop]):           del entities_yaml[entity]["properties"][prop]["name"]
-                if ("mandatory" in entities_yaml[entity]["properties"][prop]):      del entities_yaml[entity]["properties"][prop]["mandatory"]
                 if ("Schema" in entities_yaml[entity]["properties"][prop]):
-                    check_as_parameter(entities_yaml[entity]["properties"][prop],       entities_yaml[entity]["properties"][prop]["Schema"])
+                    check_as_parameter(entities_yaml[entity]["properties"][prop],       entities_yaml[entity]["properties"][prop]["Schema"], schema_parameters)
 
     # Add Paths
     open_api_yaml["paths"] = paths
@@ -1425,7 +2167,7 @@ def lets_do_openapi_yaml():
     if "components"   in open_api_yaml : open_api["components"]   = open_api_yaml["components"]
 
     # Some Custom for NEF_Configuration_Service
-    if ("NEF_Configuration_Service" in data_model) :
+    if ("NEF_Configuration_Service" in ctx.data_model) :
         for path in open_api["paths"] :
             for op in open_api["paths"][path]:
                 if (op == "get") :
@@ -1442,35 +2184,214 @@ def lets_do_openapi_yaml():
     Term.print_verbose(open_api)
 
     # Done - Save
-    yaml_text = yaml.safe_dump(open_api, indent=2, default_flow_style=False, sort_keys=False)
-    Term.print_verbose(yaml_text)
-    yaml_file = output_dir + os.sep + FileSystem.get_basename(data_model)+".yaml"
-    FileSystem.saveFileContent(yaml_text, yaml_file)
+    Term.print_verbose(lambda: Emitter.yaml_text(open_api))
+    yaml_file = ctx.output_dir + os.sep + ctx.get_basename()+".yaml"
+    # With a BuildCache, the YAML dump is skipped if the OpenAPI is the same as last run (hashing it is much faster)
+    output = "split" if (ctx.openapi_split) else "yaml"
+    openapi_hash = BuildCache.hash(json.dumps(open_api, default=str)) if (ctx.build_cache) else None
+    if (ctx.build_cache) and (ctx.build_cache.get("openapi", output, openapi_hash) is not None) and (FileSystem.is_FileExist(yaml_file)):
+        Term.print_verbose("Unchanged : [" + yaml_file + "]")
+    elif (ctx.openapi_split):
+        save_openapi_split(ctx, open_api)
+    else:
+        Emitter.save_yaml(open_api, yaml_file)
+    if (ctx.build_cache):
+        ctx.build_cache.put("openapi", output, openapi_hash, yaml_file)
     Term.print_blue("Ready   : " + yaml_file)
 
 
+###
+### OpenAPI Split Output
+###
+
+openapi_parts_suffix = "_openapi"
+# Group of the paths without PATH_PREFIX : group names of prefixes never start with "_"
+openapi_default_group = "_root"
+
+
+def openapi_external_refs(node, schemas_uri : str, root_uri : str):
+    """ Copy of an OpenAPI part, with its #/components/schemas/<name> references to schemas_uri<name>.yaml,
+    and its other local references to the root document """
+    if (isinstance(node, dict)):
+        copied = dict()
+        for key, value in node.items():
+            if ((key == "$ref") and isinstance(value, str) and value.startswith("#/")):
+                if (value.startswith("#/components/schemas/")):
+                    value = schemas_uri + value[len("#/components/schemas/"):] + ".yaml"
+                else:
+                    value = root_uri + value
+                copied[key] = value
+            else:
+                copied[key] = openapi_external_refs(value, schemas_uri, root_uri)
+        return copied
+    if (isinstance(node, list)):
+        return [openapi_external_refs(value, schemas_uri, root_uri) for value in node]
+    return node
+
+
+def openapi_path_group(prefixes : list, path : str) -> str:
+    """ Group file name of a path : its longest PATH_PREFIX, openapi_default_group if none """
+    stripped = path.strip("/")
+    for prefix in prefixes:
+        if ((stripped == prefix) or stripped.startswith(prefix + "/")):
+            group = re.sub("[^A-Za-z0-9_.-]+", "_", prefix).strip("_")
+            if (group):
+                return group
+    return openapi_default_group
+
+
+def openapi_parts_worker(parts : list) -> list:
+    """ Save (file, data) parts, in a worker process - returns the files written, unchanged files are not """
+    return [file_name for file_name, data in parts if (FileSystem.saveFileContent(Emitter.yaml_text(data), file_name))]
+
+
+def save_openapi_split(ctx : GenerationContext, open_api : dict):
+    """ OpenAPI as a root document <model>.yaml, referring with external $refs to <model>_openapi/ :
+    - schemas/<name>.yaml : one file per component schema
+    - paths/<group>.yaml  : paths grouped by PATH_PREFIX, referred to as <group>.yaml#/<escaped path>
+    Parts are saved in parallel with ctx.render_jobs > 1, only if changed. Parts of removed schemas / groups are deleted.
+    """
+    basename  = ctx.get_basename()
+    parts_uri = basename + openapi_parts_suffix + "/"
+    parts_dir = ctx.output_dir + os.sep + basename + openapi_parts_suffix
+    root_uri  = "../../" + basename + ".yaml"
+    parts     = list()  # (file, data)
+
+    root = dict(open_api)  # Paths & schemas replaced by their $refs, in place
+    if ("paths" in open_api):
+        prefixes = sorted(set(str(entity["PATH_PREFIX"]).strip("/") for entity in ctx.entities.values() if (entity.get("PATH_PREFIX"))),
+                          key=len, reverse=True)
+        groups = dict()
+        root["paths"] = dict()
+        for path in open_api["paths"]:
+            group = openapi_path_group(prefixes, path)
+            groups.setdefault(group, dict())[path] = open_api["paths"][path]
+            pointer = urllib.parse.quote(path.replace("~", "~0").replace("/", "~1"), safe="~")
+            root["paths"][path] = {"$ref": parts_uri + "paths/" + group + ".yaml#/" + pointer}
+        for group in groups:
+            parts.append((parts_dir + os.sep + "paths" + os.sep + group + ".yaml", openapi_external_refs(groups[group], "../schemas/", root_uri)))
+    if ("components" in open_api) and ("schemas" in open_api["components"]):
+        root["components"] = dict(open_api["components"])
+        root["components"]["schemas"] = dict()
+        for name, schema in open_api["components"]["schemas"].items():
+            root["components"]["schemas"][name] = {"$ref": parts_uri + "schemas/" + name + ".yaml"}
+            parts.append((parts_dir + os.sep + "schemas" + os.sep + name + ".yaml", openapi_external_refs(schema, "", root_uri)))
+
+    FileSystem.createDir(parts_dir + os.sep + "paths")
+    FileSystem.createDir(parts_dir + os.sep + "schemas")
+    jobs = min(ctx.render_jobs if (ctx.render_jobs) else 1, len(parts))
+    if (jobs > 1):
+        chunks = [parts[i::jobs] for i in range(jobs)]
+        with concurrent.futures.ProcessPoolExecutor(max_workers=jobs, initializer=Term.setSettings, initargs=(Term.getSettings(),)) as pool:
+            written = [file_name for chunk in pool.map(openapi_parts_worker, chunks) for file_name in chunk]
+        FileSystem.countFiles(len(written), len(parts) - len(written))
+    else:
+        written = openapi_parts_worker(parts)
+    written += openapi_parts_worker([(ctx.output_dir + os.sep + basename + ".yaml", root)])
+
+    # Parts not generated any more
+    generated = set(file_name for file_name, data in parts)
+    removed   = 0
+    for part_dir in [parts_dir + os.sep + "paths", parts_dir + os.sep + "schemas"]:
+        for file_name in sorted(os.listdir(part_dir)):
+            if (file_name.endswith(".yaml") and ((part_dir + os.sep + file_name) not in generated)):
+                os.remove(part_dir + os.sep + file_name)
+                removed += 1
+    Term.print_blue("OpenAPI Files : " + str(len(written)) + " written, " + str(len(parts) + 1 - len(written)) + " unchanged, " + str(removed) + " removed")
+    return written
+
+
 baseURI  = "https://amdocs.com/schemas/nef/"
-schemas  = {}
 
+SCHEMA_DEFS_MODES = ["inline", "reachable", "shared"]
+
+
+def json_schema_refs(node, refs : set = None) -> set:
+    """ Names of the #/$defs/<name> references in a schema """
+    refs = set() if (refs is None) else refs
+    if (isinstance(node, dict)):
+        for key, value in node.items():
+            if ((key == "$ref") and isinstance(value, str) and value.startswith("#/$defs/")):
+                refs.add(value[len("#/$defs/"):])
+            else:
+                json_schema_refs(value, refs)
+    elif (isinstance(node, list)):
+        for value in node:
+            json_schema_refs(value, refs)
+    return refs
+
+
+def json_schema_rebase(node, prefix : str, refs : str = "#/$defs/"):
+    """ Copy of a schema, with the references starting with refs prefixed (#/$defs/<name> : to refer to a shared definitions document) """
+    if (isinstance(node, dict)):
+        return {key: ((prefix + value) if ((key == "$ref") and isinstance(value, str) and value.startswith(refs)) else json_schema_rebase(value, prefix, refs))
+                for key, value in node.items()}
+    if (isinstance(node, list)):
+        return [json_schema_rebase(value, prefix, refs) for value in node]
+    return node
 
-def lets_do_json_schema():
-    global data_model, input_dir, output_dir
+
+def json_schema_bundle(schemas : dict, mode : str = "inline", defs_uri : str = None):
+    """
+    Root schemas (with a _ROOT property) & their definitions, schemas are not modified :
+    - inline    : all the other schemas in the $defs of each root
+    - reachable : only the schemas reachable from the root in its $defs
+    - shared    : one definitions document, returned with the roots, referred to as defs_uri#/$defs/<name>
+    Returns (roots, shared definitions document or None)
+    """
+    if (mode not in SCHEMA_DEFS_MODES):
+        raise ValueError("Invalid $defs mode [" + str(mode) + "], expected one of : " + ", ".join(SCHEMA_DEFS_MODES))
+    definitions = {}
+    root_names  = []
+    for name in schemas:
+        if ("properties" not in schemas[name]): continue
+        definition = {key: value for key, value in schemas[name].items() if (key not in ["$schema", "$id", "$defs"])}
+        if ("_ROOT" in schemas[name]["properties"]):
+            root_names.append(name)
+            definition["properties"] = {key: value for key, value in definition["properties"].items() if (key != "_ROOT")}
+        definitions[name] = definition
+    refs  = {name: json_schema_refs(definitions[name]["properties"]) for name in definitions}
+    roots = {}
+    for root in root_names:
+        bundle = {key: value for key, value in schemas[root].items() if (key != "$defs")}
+        bundle["properties"] = definitions[root]["properties"]
+        if (mode == "shared"):
+            bundle["properties"] = json_schema_rebase(bundle["properties"], defs_uri)
+        elif (mode == "reachable"):
+            reached = set()
+            todo    = [root]
+            while (todo):
+                for name in refs[todo.pop()]:
+                    if ((name in definitions) and (name not in reached) and (name != root)):
+                        reached.add(name)
+                        todo.append(name)
+            bundle["$defs"] = {name: definitions[name] for name in definitions if (name in reached)}
+        else:
+            # Other roots included too, they may be referenced
+            bundle["$defs"] = {name: definitions[name] for name in definitions if ((name != root) and (name not in root_names))}
+            bundle["$defs"].update({name: definitions[name] for name in root_names if (name != root)})
+        roots[root] = bundle
+    if (mode != "shared"):
+        return roots, None
+    shared = {
+        "$schema" : "http://json-schema.org/draft-07/schema",
+        "$id"     : baseURI + defs_uri,
+        "title"   : "Shared Definitions",
+        "$defs"   : definitions
+    }
+    return roots, shared
+
+
+def lets_do_json_schema(ctx : GenerationContext):
     Term.print_yellow("> lets_do_json Schema")
-    ex_objets = {}
+    data_model = ctx.data_model
+    schemas    = ctx.schemas
+    links      = ctx.links
+    ex_objets  = {}
 
-    # Clean-up before generation
-    entities_json = copy.deepcopy(entities)
+    # Entities without bookkeeping - read only
+    entities_json = project_entities(ctx.entities, ENTITY_INTERNAL_KEYS)
     for entity in entities_json:
-        if ("TABLE" in entities_json[entity])     : del entities_json[entity]["TABLE"]
-        if ("RELATIONS" in entities_json[entity]) : del entities_json[entity]["RELATIONS"]
-        if ("NAME" in entities_json[entity])      : del entities_json[entity]["NAME"]
-        if ("prepend" in entities_json[entity])   : del entities_json[entity]["prepend"]
-        if ("append" in entities_json[entity])    : del entities_json[entity]["append"]
-        if ("options" in entities_json[entity])   : del entities_json[entity]["options"]
-        if ("PATH_OPERATION" in entities_json[entity]):  del entities_json[entity]["PATH_OPERATION"]
-        if ("PATH_PARAMETERS" in entities_json[entity]): del entities_json[entity]["PATH_PARAMETERS"]
-        if ("PATH_PREFIX" in entities_json[entity]):     del entities_json[entity]["PATH_PREFIX"]
-        if ("PATH"  in entities_json[entity]):           del entities_json[entity]["PATH"]
         # if ("name" in entities_json[entity]) :           del entities_json[entity]["name"]
         # if ("mandatory" in entities_json[entity]) :      del entities_json[entity]["mandatory"]
         Term.print_verbose("> " + entity)
@@ -1482,11 +2403,11 @@ def lets_do_json_schema():
 
     for entity in entities_json:
         Term.print_yellow("["+entity+"]")
-        Term.print_verbose(json.dumps(entities_json[entity], indent=3))
+        Term.print_verbose(lambda: json.dumps(entities_json[entity], indent=3))
         Term.print_verbose(" - description : " + str(entities_json[entity]["description"]))
         Term.print_verbose(" - type        : " + str(entities_json[entity]["type"]))
         Term.print_verbose(" - example     : " + str(entities_json[entity]["example"]))
-        Term.print_verbose(" - " + str(entities_json[entity]))
+        Term.print_verbose(lambda: " - " + str(entities_json[entity]))
 
         json_object = {}
         json_schema = {}
@@ -1504,10 +2425,10 @@ def lets_do_json_schema():
         json_schema["additionalProperties"] = True
 
         for new_property in object_desc["properties"]:
-            Term.print_verbose(" #> [" + str(object_desc["properties"][new_property]) + "]")
-            Term.print_verbose(json.dumps(object_desc["properties"][new_property], indent=3))
+            Term.print_verbose(lambda: " #> [" + str(object_desc["properties"][new_property]) + "]")
+            Term.print_verbose(lambda: json.dumps(object_desc["properties"][new_property], indent=3))
             property_desc = object_desc["properties"][new_property]
-            Term.print_verbose(" #>> " + str(property_desc))
+            Term.print_verbose(lambda: " #>> " + str(property_desc))
             prop_schema = {}
             if ("$ref" in property_desc):
                 # Sub-object
@@ -1574,7 +2495,7 @@ def lets_do_json_schema():
                 if (property_desc["mandatory"] and property_desc["mandatory"] == "y"):
                     json_schema["required"].append(property_desc["name"])
                 json_schema["properties"][property_desc["name"]] = prop_schema
-        Term.print_verbose("Sample Object: "+str(json_object))
+        Term.print_verbose(lambda: "Sample Object: "+str(json_object))
         json_schema["examples"]  = [json_object]
         ex_objets[entity] = json_object
         schemas[entity]   = json_schema
@@ -1590,53 +2511,228 @@ def lets_do_json_schema():
 
     # Add $defs Sub-Objects Schemas & Generating Schemas
     schema_file = None
-    for schema in schemas:
-        if "properties" not in schemas[schema]: continue
-        if "_ROOT" in schemas[schema]["properties"] :
-            # del schemas[schema]["properties"]["_ROOT"]
-            schemas[schema]["$defs"] = {}
-            for schema2 in schemas:
-                if "properties" not in schemas[schema]: continue
-                if "_ROOT" in schemas[schema2]["properties"] :
-                    del schemas[schema2]["properties"]["_ROOT"]
-                    continue
-                del schemas[schema2]["$schema"]
-                del schemas[schema2]["$id"]
-                schemas[schema]["$defs"][schema2] = schemas[schema2]
-            # Generate Schema File - multiple _ROOT
-            schema_file = output_dir + FileSystem.get_basename(data_model) + "_" + schema + "_Schema.json"
-            FileSystem.saveFileContent(json.dumps(schemas[schema], indent=3), schema_file)
-            # Generate Schema File - assuming only one _ROOT
-            schema_file = data_model + "_Schema.json"
-            FileSystem.saveFileContent(json.dumps(schemas[schema], indent=3), schema_file)
+    defs_file   = ctx.get_basename() + "_Defs.json"
+    roots, shared = json_schema_bundle(schemas, ctx.schema_defs, defs_file)
+    if (shared):
+        Emitter.save_json(shared, ctx.output_dir + os.sep + defs_file, compact=ctx.compact_json)
+    for root in roots:
+        # Generate Schema File - multiple _ROOT
+        schema_file = ctx.output_dir + os.sep + ctx.get_basename() + "_" + root + "_Schema.json"
+        Emitter.save_json(roots[root], schema_file, compact=ctx.compact_json)
+    if (roots):
+        # Generate Schema File - first _ROOT
+        schema_file = data_model + "_Schema.json"
+        schema      = roots[next(iter(roots))]
+        if (shared):
+            # Next to the model : refers to the definitions document in the output dir
+            defs_dir = os.path.relpath(ctx.output_dir, os.path.dirname(os.path.abspath(schema_file))).replace(os.sep, "/")
+            schema   = json_schema_rebase(schema, ("" if (defs_dir == ".") else defs_dir + "/"), refs=defs_file + "#")
+        Emitter.save_json(schema, schema_file, compact=ctx.compact_json)
 
     Term.print_yellow("< lets_do_json Schema")
 
-    Term.print_verbose(json.dumps(ex_objets, indent=3))
+    Term.print_verbose(lambda: json.dumps(ex_objets, indent=3))
     if (schema_file) :
         Term.print_blue("Ready   : "+schema_file)
     else:
         Term.print_error("No _ROOT Entry")
 
 
-def lets_do_datastore(with_upload : bool = True):
-    global data_model, input_dir, output_dir
+###
+### Datastore Upload
+###
+
+default_datastore_url = "https://127.0.0.1:5000"
+
+
+class DatastoreUploader:
+    """ Posts the datastore schemas of the _PATH entities : one pooled session per thread, bounded concurrency,
+    timeouts, and retries with exponential backoff. A ?create post is not idempotent : it is only retried when
+    it was not processed : connection not established (refused, connect timeout), 429 or 503 - never after
+    the connection was aborted, a read timeout or another 5xx.
+    """
+
+    RETRY_STATUS = [429, 503]
+
+    def __init__(self, base_url : str = default_datastore_url, jobs : int = 8, timeout : float = 10.0,
+                 retries : int = 3, backoff : float = 0.5, verify : bool = True):
+        self.base_url = base_url.rstrip("/")
+        self.jobs     = max(1, jobs)
+        self.timeout  = timeout   # Seconds, connect & read
+        self.retries  = retries   # Attempts after the first one
+        self.backoff  = backoff   # Seconds before the first retry, doubled for each next one
+        self.verify   = verify    # TLS certificate verification
+        self.local    = threading.local()
+        self.sessions = list()
+        self.sessions_lock = threading.Lock()
+
+    def __getstate__(self):
+        """ Picklable, e.g. in the options of a batch process : the sessions are not shared """
+        state = self.__dict__.copy()
+        for attribute in ["local", "sessions", "sessions_lock"]:
+            del state[attribute]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.local    = threading.local()
+        self.sessions = list()
+        self.sessions_lock = threading.Lock()
+
+    def url(self, api_target : str) -> str:
+        return self.base_url + "/datastore/" + api_target + "s" + "?create"
+
+    def session(self):
+        """ Session of the current thread, its connections are kept alive across posts """
+        if (not hasattr(self.local, "session")):
+            import requests
+            session = requests.Session()
+            session.verify = self.verify
+            self.local.session = session
+            with self.sessions_lock:
+                self.sessions.append(session)
+        return self.local.session
+
+    def close(self):
+        with self.sessions_lock:
+            for session in self.sessions:
+                session.close()
+            self.sessions = list()
+        self.local = threading.local()
+
+    def post(self, entity : str, api_target : str, schema : dict) -> dict:
+        """ Result : entity, url, status (None if no response), attempts, seconds, error (None if created) """
+        import requests
+        result  = {"entity": entity, "url": self.url(api_target), "status": None, "attempts": 0, "seconds": 0.0, "error": None}
+        started = time.perf_counter()
+        while (True):
+            result["attempts"] += 1
+            retry = False
+            try:
+                response = self.session().post(result["url"], json=schema, timeout=self.timeout)
+                result["status"] = response.status_code
+                result["error"]  = None if (response.ok) else ("HTTP " + str(response.status_code) + " " + response.reason)
+                retry = response.status_code in DatastoreUploader.RETRY_STATUS
+            except requests.ConnectionError as ex:
+                # Also raised once the post was sent (connection aborted, SSL error) : only retried if not sent
+                result["error"] = type(ex).__name__ + " : " + str(ex)
+                retry = DatastoreUploader.not_sent(ex)
+            except requests.RequestException as ex:
+                result["error"] = type(ex).__name__ + " : " + str(ex)
+            if ((not retry) or (result["attempts"] > self.retries)):
+                break
+            time.sleep(self.backoff * (2 ** (result["attempts"] - 1)))
+        result["seconds"] = time.perf_counter() - started
+        return result
+
+    @staticmethod
+    def not_sent(ex) -> bool:
+        """ The connection to the datastore was not established : connect timeout, or connection refused / name not resolved """
+        import requests
+        import urllib3
+        if (isinstance(ex, requests.ConnectTimeout)):
+            return True
+        reason = ex.args[0] if (ex.args) else None
+        if (isinstance(reason, urllib3.exceptions.MaxRetryError)):
+            reason = reason.reason
+        return isinstance(reason, urllib3.exceptions.NewConnectionError)
+
+    def upload(self, targets : list) -> list:
+        """ Posts (entity, api_target, schema) targets, results in targets order """
+        try:
+            if ((self.jobs == 1) or (len(targets) <= 1)):
+                return [self.post(*target) for target in targets]
+            with concurrent.futures.ThreadPoolExecutor(max_workers=min(self.jobs, len(targets))) as executor:
+                return list(executor.map(lambda target: self.post(*target), targets))
+        finally:
+            self.close()
+
+    @staticmethod
+    def report(results : list):
+        for result in results:
+            text = result["entity"] + " : " + result["url"] + " [" + str(result["status"]) + "] " \
+                   + str(result["attempts"]) + " attempt(s), " + "%.3f" % result["seconds"] + " s"
+            if (result["error"]):
+                Term.print_error(text + " - " + result["error"])
+            else:
+                Term.print_blue(text)
+        failed = [result for result in results if (result["error"])]
+        Term.print_blue("Uploaded : " + str(len(results) - len(failed)) + "/" + str(len(results)) + " schemas")
+
+
+def containment_graph(ctx : GenerationContext, entities : dict) -> dict:
+    """ Containing entity -> [(contained entity, cardinality)] in entities order, built once from the links """
+    order = {name: position for position, name in enumerate(entities)}
+    graph = dict()
+    for link in ctx.links.values():
+        containing = link["TableContaining"]
+        contained  = link["TableContained"]
+        if ((containing == contained) or (containing not in order) or (contained not in order)): continue
+        contains = graph.setdefault(containing, dict())
+        if (contained not in contains):
+            contains[contained] = find_table_cardinatilty(ctx, containing, contained)
+    return {containing: sorted(contains.items(), key=lambda item: order[item[0]]) for containing, contains in graph.items()}
+
+
+def datastore_schemas(ctx : GenerationContext, entities_json : dict) -> dict:
+    """ Schemas of the _PATH entities : contained _PATH entities are referred to by schema file,
+    other contained entities are added to $defs, with the entities they contain in turn.
+    Each entity is resolved once, entities_json is not modified.
+    """
+    graph    = containment_graph(ctx, entities_json)
+    prefix   = os.path.basename(ctx.data_model) + "_"
+    resolved = dict()  # Entity -> (copy with the contained properties referring to their schema, internal contained entities)
+
+    def resolve(name : str):
+        if (name in resolved):
+            return resolved[name]
+        entity_desc = dict(entities_json[name])
+        entity_desc["properties"] = dict(entity_desc["properties"])
+        internals = list()
+        for contained, card in graph.get(name, []):
+            if (contained not in entity_desc["properties"]): continue
+            external = "PATH" in entities_json[contained]
+            target   = (prefix + contained + "_Schema.json") if (external) else ("#/$defs/" + contained)
+            prop     = dict(entity_desc["properties"][contained])
+            if (card in ["OneToOne", "ZeroToOne"]):
+                prop["$ref"] = target
+            elif (card in ["OneToMore", "ZeroToMore"]):
+                prop["type"]  = "array"
+                prop["items"] = {"$ref": target}
+            else:
+                continue
+            entity_desc["properties"][contained] = prop
+            if (not external):
+                internals.append(contained)
+        resolved[name] = (entity_desc, internals)
+        return resolved[name]
+
+    schemas = dict()
+    for entity in entities_json:
+        if ("PATH" not in entities_json[entity]): continue
+        entity_desc, internals = resolve(entity)
+        schema = dict(entity_desc)
+        # $defs closure, breadth first : contained entities first, in entities order
+        defs = dict()
+        todo = collections.deque(internals)
+        while (todo):
+            contained = todo.popleft()
+            if ((contained in defs) or (contained == entity)): continue
+            defs[contained], nested = resolve(contained)
+            todo.extend(nested)
+        if (defs):
+            schema["$defs"] = defs
+        schemas[entity] = schema
+    return schemas
+
+
+def lets_do_datastore(ctx : GenerationContext, with_upload : bool = True):
     Term.print_yellow("> lets_do_datastore API Targets")
 
-    entities_json = copy.deepcopy(entities)
+    # Entities without bookkeeping, keeping NAME & PATH - datastore_schemas copies the properties it completes with $ref
+    entities_json = project_entities(ctx.entities, [key for key in ENTITY_INTERNAL_KEYS if (key not in ["NAME", "PATH"])])
 
-    # Clean-up before generation
     for entity in entities_json:
-        if ("TABLE" in entities_json[entity])     : del entities_json[entity]["TABLE"]
-        if ("RELATIONS" in entities_json[entity]) : del entities_json[entity]["RELATIONS"]
-        # if ("NAME" in entities_json[entity])      : del entities_json[entity]["NAME"]
-        if ("prepend" in entities_json[entity])   : del entities_json[entity]["prepend"]
-        if ("append" in entities_json[entity])    : del entities_json[entity]["append"]
-        if ("options" in entities_json[entity])   : del entities_json[entity]["options"]
-        if ("PATH_OPERATION" in entities_json[entity]):  del entities_json[entity]["PATH_OPERATION"]
-        if ("PATH_PARAMETERS" in entities_json[entity]): del entities_json[entity]["PATH_PARAMETERS"]
-        if ("PATH_PREFIX" in entities_json[entity]):     del entities_json[entity]["PATH_PREFIX"]
-        # if ("PATH"  in entities_json[entity]):           del entities_json[entity]["PATH"]
         # if ("name" in entities_json[entity]) :           del entities_json[entity]["name"]
         # if ("mandatory" in entities_json[entity]) :      del entities_json[entity]["mandatory"]
         Term.print_verbose("> " + entity)
@@ -1647,127 +2743,290 @@ def lets_do_datastore(with_upload : bool = True):
             continue
 
     # Generating Schema for _PATH Entities
-    for entity in entities_json:
-        entity_desc = entities_json[entity]
-        if ("PATH" not in entity_desc) : continue
-        api_target = entity_desc["PATH"]
-        name = entity_desc["NAME"]
-        schema_file = data_model + "_" + name + "_Schema.json"
-        schema = schemas[name]
-
-        # Add $defs Sub-Objects Schemas
-        for schema in schemas:
-            if (schema == entity) : continue
-            if (schema not in find_table_contained_names(entity)): continue
-            # Entity contain this schema
-            if ("PATH" in entities_json[schema]):
-                # Entity is external
-                card = find_table_cardinatilty(entity, schema)
-                if (card and (card == "OneToOne" or card == "ZeroToOne")):
-                    # del entities_json[entity]["properties"][schema]["description"]
-                    entities_json[entity]["properties"][schema]["$ref"] = os.path.basename(data_model) + "_" + schema + "_Schema.json"
-                if (card and (card == "OneToMore" or card == "ZeroToMore")):
-                    # del entities_json[entity]["properties"][schema]["description"]
-                    entities_json[entity]["properties"][schema]["type"]  = "array"
-                    entities_json[entity]["properties"][schema]["items"] = {}
-                    entities_json[entity]["properties"][schema]["items"]["$ref"] = os.path.basename(data_model) + "_" + schema + "_Schema.json"
-                pass
-            else:
-                # Entity is internal - Add to internal schema
-                card = find_table_cardinatilty(entity, schema)
-                if (card and (card == "OneToOne" or card == "ZeroToOne")):
-                    # del entities_json[entity]["properties"][schema]["description"]
-                    entities_json[entity]["properties"][schema]["$ref"] = "#/$defs/"+schema
-                    if ("$defs" not in entities_json[entity]):
-                        entities_json[entity]["$defs"] = {}
-                    entities_json[entity]["$defs"][schema] = entities_json[schema]
-                if (card and (card == "OneToMore" or card == "ZeroToMore")):
-                    # del entities_json[entity]["properties"][schema]["description"]
-                    entities_json[entity]["properties"][schema]["type"]  = "array"
-                    entities_json[entity]["properties"][schema]["items"] = {}
-                    entities_json[entity]["properties"][schema]["items"]["$ref"] = "#/$defs/"+schema
-                    if ("$defs" not in entities_json[entity]):
-                        entities_json[entity]["$defs"] = {}
-                    entities_json[entity]["$defs"][schema] = entities_json[schema]
+    schemas = datastore_schemas(ctx, entities_json)
 
     Term.print_yellow("< lets_do_datastore")
 
     if (not with_upload):
-        return
+        return schemas
 
     Term.print_yellow("> lets_do_datastore upload")
 
-    # Creating DataStore and Loading Schema for _PATH Entities
-    for entity in entities_json:
-        entity_desc = entities_json[entity]
-        if ("PATH" not in entity_desc): continue
-        api_target = entity_desc["PATH"]
-        if ("PATH"  in entities_json[entity]):           del entities_json[entity]["PATH"]
-        schema_file = output_dir + os.sep + FileSystem.get_basename(data_model) + "_" + entity + "_Schema.json"
+    # Saving & Loading Schema for _PATH Entities
+    targets = list()
+    for entity in schemas:
+        api_target = schemas[entity]["PATH"]
+        del schemas[entity]["PATH"]
+        schema_file = ctx.output_dir + os.sep + ctx.get_basename() + "_" + entity + "_Schema.json"
         Term.print_yellow(schema_file)
-        FileSystem.saveFileContent(json.dumps(entities_json[entity], indent=3), schema_file)
-        curl = 'curl -X POST -H "Content-Type: application/json" -d @'+schema_file+' https://127.0.0.1:5000/datastore/'+api_target+'?create'
-        Term.print_yellow(curl)
-        req = "https://127.0.0.1:5000"+"/datastore/"+api_target+"s"+"?create"
-        res = requests.post(req, json=schema, verify=False)
-        Term.print_yellow(str(res))
+        Emitter.save_json(schemas[entity], schema_file, compact=ctx.compact_json)
+        targets.append((entity, api_target, schemas[entity]))
+
+    # Creating DataStore for _PATH Entities
+    uploader = ctx.datastore if (ctx.datastore) else DatastoreUploader()
+    results  = uploader.upload(targets)
+    DatastoreUploader.report(results)
+    failed = [result["entity"] for result in results if (result["error"])]
+    if (failed):
+        raise RuntimeError("Datastore upload failed for : " + ", ".join(failed))
 
     Term.print_yellow("< lets_do_datastore upload")
 
 
-def lets_do_render():
-    global data_model, input_dir, output_dir, openapi
+def lets_do_render(ctx : GenerationContext):
     Term.print_yellow("> lets_do_render artifacts")
 
     context = {
-        "DATAMODEL" : FileSystem.get_basename(data_model),
-        "OPENAPI"   : openapi,
-        "ENTITIES"  : entities
+        "DATAMODEL" : ctx.get_basename(),
+        "OPENAPI"   : ctx.openapi,
+        "ENTITIES"  : ctx.entities
     }
-    FileSystem.renderDir(input_dir, output_dir, context)
+    times = FileSystem.renderDir(ctx.input_dir, ctx.output_dir, context, cache=ctx.build_cache, jobs=ctx.render_jobs,
+                                 compact_json=ctx.compact_json, context_dumps=ctx.context_dumps)
+    if (ctx.profiler):
+        ctx.profiler.templates.update(times)
 
     Term.print_yellow("< lets_do_render")
 
 
-def lets_do_it(do_what : str = "openapi, render"):
-    global data_model, input_dir, output_dir
-    input_dir  = data_model + input_dir_suffix
-    output_dir = data_model + output_dir_suffix
-    if FileSystem.is_FileExist(data_model+".architect"):
-        Term.print_blue("Reading : "+data_model+".architect")
-        architect = Architect()
-        architect.read_architect(data_model)
-    elif FileSystem.is_FileExist(data_model+".dbs"):
-        Term.print_error("Disabled : "+data_model+".dbs")
+def lets_do_it(do_what : str = "openapi, render", ctx : GenerationContext = None) -> GenerationContext:
+    """ Generate do_what ("openapi, schema, datastore, render") for the ctx data model (default : data_model).
+    With "incremental", only what changed since the previous run is rebuilt.
+    With a ctx.profiler, the time & memory of each stage are reported.
+    """
+    if (ctx is None):
+        ctx = GenerationContext(data_model)
+    with FileSystem.countingFiles(ctx):
+        if (ctx.profiler is None):
+            return lets_do_stages(do_what, ctx)
+        ctx.profiler.start()
+        try:
+            return lets_do_stages(do_what, ctx)
+        finally:
+            ctx.profiler.stop()
+            ctx.profiler.report()
+
+
+def lets_do_stages(do_what : str, ctx : GenerationContext) -> GenerationContext:
+    ctx.reset()
+    if (ctx.build_cache is None) and ("incremental" in do_what.lower()) :
+        ctx.build_cache = BuildCache(ctx.output_dir + os.sep + ctx.get_basename() + cache_file_suffix).load()
+    if (ctx.build_cache):
+        ctx.build_cache.start_run()
+    if FileSystem.is_FileExist(ctx.data_model+".architect"):
+        model_cache = None
+        model = None
+        with profile_stage(ctx, "read_architect"):
+            if (ctx.model_cache):
+                FileSystem.createDir(ctx.output_dir)
+                model_cache = ModelCache(ctx.output_dir + os.sep + ctx.get_basename() + model_cache_suffix)
+                model_key   = ModelCache.key(ctx.data_model+".architect")
+                model       = model_cache.load(model_key)
+            if (model):
+                Term.print_blue("Cached  : "+ctx.data_model+".architect")
+                ctx.entities          = model["entities"]
+                ctx.links             = model["links"]
+                ctx.schema_parameters = model["schema_parameters"]
+                ctx.model_index       = ModelIndex(ctx.entities, ctx.links)
+            else:
+                Term.print_blue("Reading : "+ctx.data_model+".architect")
+                architect = Architect(ctx)
+                architect.read_architect(ctx.data_model)
+                if (model_cache):
+                    model_cache.save(model_key, {"entities": ctx.entities, "links": ctx.links, "schema_parameters": ctx.schema_parameters})
+    elif FileSystem.is_FileExist(ctx.data_model+".dbs"):
+        Term.print_error("Disabled : "+ctx.data_model+".dbs")
         # Term.print_blue("Reading : "+data_model+".dbs")
-        # dbschema = DbSchema()
-        # dbschema.read_dbschema(the_data_model)
+        # dbschema = DbSchema(ctx)
+        # dbschema.read_dbschema(ctx.data_model)
     else:
-        Term.print_error("Model not found : "+data_model)
-        return
+        Term.print_error("Model not found : "+ctx.data_model)
+        return ctx
 
-    FileSystem.createDir(data_model + input_dir_suffix)
-    FileSystem.createDir(data_model + output_dir_suffix)
+    FileSystem.createDir(ctx.input_dir)
+    FileSystem.createDir(ctx.output_dir)
 
     if ("schema" in do_what.lower()) :
-        lets_do_json_schema()
+        with profile_stage(ctx, "lets_do_json_schema"):
+            lets_do_json_schema(ctx)
     if (("openapi" in do_what.lower()) or ("yaml" in do_what.lower())) :
-        lets_do_openapi_yaml()
+        with profile_stage(ctx, "lets_do_openapi_yaml"):
+            lets_do_openapi_yaml(ctx)
     if ("datastore" in do_what.lower()) :
-        lets_do_datastore()
+        with profile_stage(ctx, "lets_do_datastore"):
+            lets_do_datastore(ctx)
     if ("render" in do_what.lower()) :
-        lets_do_render()
+        with profile_stage(ctx, "lets_do_render"):
+            lets_do_render(ctx)
+
+    if (ctx.build_cache):
+        ctx.build_cache.save()
+        ctx.build_cache.report()
+    Term.print_blue("Files   : " + str(ctx.files_written) + " written, " + str(ctx.files_unchanged) + " unchanged")
+    return ctx
+
+
+def watch_snapshot(model_file : str, templates_dir : str) -> dict:
+    """ Modification time & size of the model file and of each template """
+    snapshot = dict()
+    for file_name in [model_file] + [templates_dir + os.sep + template for template in FileSystem.safeListFiles(templates_dir, keepExt=True)]:
+        try:
+            stat = os.stat(file_name)
+            snapshot[file_name] = (stat.st_mtime, stat.st_size)
+        except OSError:
+            snapshot[file_name] = None
+    return snapshot
+
+
+def lets_do_watch(do_what : str = "openapi, render", interval : float = 1.0, debounce : float = 0.5, ctx : GenerationContext = None,
+                  cycles : int = None):
+    """ Generate do_what, then keep watching the model & templates, and generate again on change :
+    - model changed     : all do_what stages, unchanged tables are reused from the previous cycle
+    - templates changed : render only, from the model of the previous cycle - all stages if the previous cycle failed
+    Until Ctrl-C, or cycles changes handled.
+    """
+    if (ctx is None):
+        ctx = GenerationContext(data_model)
+    cache_file = None
+    if ("incremental" in do_what.lower()):
+        cache_file = ctx.output_dir + os.sep + ctx.get_basename() + cache_file_suffix
+    cache = ctx.build_cache = BuildCache(cache_file).load()
+    model_file    = ctx.data_model + ".architect"
+    templates_dir = ctx.input_dir
+    lets_do_it(do_what, ctx)
+    snapshot = watch_snapshot(model_file, templates_dir)
+    Term.print_yellow("> Watching : [" + model_file + "] and [" + templates_dir + "] - Ctrl-C to stop")
+    handled = 0
+    ready   = True  # ctx holds a complete model - not after a failed generation, which resets it
+    try:
+        while (cycles is None) or (handled < cycles):
+            time.sleep(interval)
+            changed = watch_snapshot(model_file, templates_dir)
+            if (changed == snapshot): continue
+            # Debounce : wait for the saves to settle
+            settled = None
+            while (settled != changed):
+                time.sleep(debounce)
+                settled, changed = changed, watch_snapshot(model_file, templates_dir)
+            model_changed = (changed.get(model_file) != snapshot.get(model_file))
+            snapshot = changed
+            handled  = handled + 1
+            try:
+                if (model_changed) or (not ready):
+                    Term.print_yellow("Changed : [" + model_file + "]")
+                    ready = False
+                    lets_do_it(do_what, ctx)
+                    ready = True
+                elif ("render" in do_what.lower()):
+                    Term.print_yellow("Changed : [" + templates_dir + "]")
+                    with FileSystem.countingFiles(ctx):
+                        ctx.files_written, ctx.files_unchanged = 0, 0
+                        cache.start_run(["templates", "context"])
+                        lets_do_render(ctx)
+                    cache.save()
+                    cache.report()
+                    Term.print_blue("Files   : " + str(ctx.files_written) + " written, " + str(ctx.files_unchanged) + " unchanged")
+            except Exception as ex:
+                Term.print_error("Generation Failed : " + model_file, str(ex))
+            finally:
+                if (not ready):
+                    # Nothing rendered from a partially read model : generated again in full on the next change
+                    ctx.reset()
+    except KeyboardInterrupt:
+        Term.print_yellow("< Watching")
+
+
+def batch_models(patterns : list) -> list:
+    """ Data Models (without .architect) for a list of model names or glob patterns, comma separated or not """
+    models = list()
+    for pattern in ",".join(patterns).split(","):
+        pattern = pattern.strip()
+        if (pattern == "") : continue
+        found = glob.glob(pattern) if glob.has_magic(pattern) else [pattern]
+        for model in sorted(found):
+            if (FileSystem.is_ext(model, ".architect")):
+                model = FileSystem.remove_extension(model)
+            if (model not in models):
+                models.append(model)
+    return models
+
+
+def batch_worker(model : str, do_what : str, options : dict = None) -> dict:
+    """ Generate one Data Model of a batch, in a pool process or thread, with the options of GenerationContext.set_options """
+    result = {"model": model, "error": None}
+    start  = time.perf_counter()
+    try:
+        if (not FileSystem.is_FileExist(model + ".architect")):
+            raise FileNotFoundError("Model not found : " + model + ".architect")
+        lets_do_it(do_what, GenerationContext(model).set_options(options))
+    except Exception as ex:
+        result["error"] = type(ex).__name__ + " : " + str(ex)
+    result["time"] = time.perf_counter() - start
+    return result
+
+
+def lets_do_batch(models : list, do_what : str = "openapi, render", jobs : int = None, threads : bool = False, options : dict = None) -> list:
+    """ Generate do_what for each Data Model, in a pool of jobs processes (default : one per core).
+    With threads, in a thread pool of this process instead - each generation has its own context.
+    Each context gets the options (GenerationContext.set_options).
+    """
+    Term.print_yellow("> lets_do_batch : " + str(len(models)) + " models")
+    jobs  = jobs if (jobs) else (os.cpu_count() or 1)
+    start = time.perf_counter()
+    if (jobs == 1) or (len(models) <= 1):
+        results = [batch_worker(model, do_what, options) for model in models]
+    else:
+        if (threads):
+            executor = concurrent.futures.ThreadPoolExecutor(max_workers=min(jobs, len(models)))
+        else:
+            executor = concurrent.futures.ProcessPoolExecutor(max_workers=min(jobs, len(models)), initializer=FileSystem.workerInit,
+                                                              initargs=(FileSystem.templates_modules_dir, Term.getSettings()))
+        with executor as pool:
+            results = list(pool.map(batch_worker, models, [do_what] * len(models), [options] * len(models)))
+    elapsed = time.perf_counter() - start
+
+    # Summary
+    failed = [result for result in results if (result["error"])]
+    for result in results:
+        if (result["error"]):
+            Term.print_red("  {:8.3f}s Failed : {} - {}".format(result["time"], result["model"], result["error"]))
+        else:
+            Term.print_blue("  {:8.3f}s Done   : {}".format(result["time"], result["model"]))
+    summary = "Batch   : {} models, {} done, {} failed, in {:.3f}s ({:.3f}s serial, {} jobs)".format(
+        len(results), len(results) - len(failed), len(failed), elapsed, sum([result["time"] for result in results]), jobs)
+    if (failed):
+        Term.print_red(summary)
+    else:
+        Term.print_blue(summary)
+    Term.print_yellow("< lets_do_batch")
+    return results
+
+
+# unittest is only imported when tests are run (python -m unittest / pytest), not at each generation start
+if (("unittest" in sys.modules) or ("pytest" in sys.modules)):
+    from unittest import TestCase
+else:
+    TestCase = object
 
 
-class Test(unittest.TestCase):
+class Test(TestCase):
 
     def setUp(self) -> None:
         Term.print_red("> Setup")
         Term.setVerbose()
         Term.print_red("< Setup")
 
+    def sample_model(self) -> str:
+        """ Copy of the Sample Data Model in a temporary directory, removed after the test """
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        sample = os.path.dirname(os.path.abspath(__file__)) + os.sep + default_data_model + ".architect"
+        shutil.copy(sample, temp_dir.name)
+        return temp_dir.name + os.sep + default_data_model
+
     def testValidateSchema(self):
         Term.print_green("> testValidateSchema")
+        from jsonschema import validate
         schema = {
             "items": {
                 "anyOf": [
@@ -1783,6 +3042,616 @@ class Test(unittest.TestCase):
         validate(instance=obj_instance, schema=schema)
         Term.print_green("< testValidateSchema")
 
+    def testModelIndex(self):
+        Term.print_green("> testModelIndex")
+        Term.setVerbose(False)
+        ctx = lets_do_it("openapi", GenerationContext(self.sample_model()))
+        index = ModelIndex(ctx.entities, ctx.links)
+        scan  = GenerationContext(ctx.data_model)
+        scan.entities, scan.links = ctx.entities, ctx.links
+        indexed = Architect(ctx)
+        scanned = Architect(scan)
+        tables  = sorted(set([entity["TABLE"] for entity in ctx.entities.values()] + ["TAB_MISSING"]))
+        names   = sorted(set(list(ctx.entities.keys()) + [entity["name"] for entity in ctx.entities.values()] + ["Missing"]))
+        for table in tables:
+            self.assertEqual(index.find_table_name(table), scanned.find_table_name(table))
+            self.assertEqual(indexed.find_table_name(table), scanned.find_table_name(table))
+        for name in names:
+            self.assertIs(find_entity(ctx.entities, name, index), find_entity(ctx.entities, name))
+            self.assertEqual(find_table_contained(ctx.links, name, index), find_table_contained(ctx.links, name))
+            self.assertEqual(find_table_contained_names(ctx, name), find_table_contained_names(scan, name))
+        for containing in ctx.entities:
+            for contained in names:
+                self.assertEqual(find_table_cardinatilty(ctx, containing, contained), find_table_cardinatilty(scan, containing, contained))
+        self.assertIsNone(index.find_table_name("TAB_MISSING"))
+        self.assertEqual(index.find_table_contained("Missing"), [])
+        self.assertIsNone(index.find_table_cardinality("Missing", "API"))
+        # Another entities dict than the indexed one : scanned
+        self.assertIsNone(find_entity(dict(), "API", index))
+        Term.print_green("< testModelIndex")
+
+    def testCollectLinks(self):
+        Term.print_green("> testCollectLinks")
+        Term.setVerbose(False)
+        def relation(rel_id, name):
+            return {"@id": rel_id, "@name": name, "@pk-table-ref": "TAB1", "@fk-table-ref": "TAB2", "@fkCardinality": "7"}
+        def table_link(rel_id, color):
+            return {"@relationship-ref": rel_id, "@rLineColor": color, "@pkLabelText": "Has", "@fkLabelText": "Items"}
+        architect = Architect(GenerationContext())
+        architect.relations   = [relation("REL1", "Black"), relation("REL2", "Grey"), relation("REL3", "No_Link"), relation("REL4", "ignore_Black")]
+        # Grey is checked for each relation, whatever the color of the first table link
+        architect.table_links = [table_link("REL2", "0x999999"), table_link("REL1", "0x000000"), table_link("REL4", "0x000000")]
+        architect.collect_links()
+        links = architect.ctx.links
+        self.assertEqual(sorted(links.keys()), ["REL1", "REL3"])
+        self.assertEqual(links["REL1"]["Description"], "Has Items")
+        self.assertEqual(links["REL3"]["Description"], "No Description")
+        self.assertEqual(architect.grey_links, {"REL2"})
+        # Sample : UsagePolicy -> UsagePolicyConfiguration is grey, API_Configuration -> UsagePolicyConfiguration is not
+        ctx = lets_do_it("openapi", GenerationContext(self.sample_model()))
+        self.assertNotIn("REL91", ctx.links)
+        self.assertIn("REL90", ctx.links)
+        self.assertNotIn("UsagePolicyConfiguration", ctx.entities["UsagePolicy"]["properties"])
+        Term.print_green("< testCollectLinks")
+
+    def testStreamArchitect(self):
+        Term.print_green("> testStreamArchitect")
+        import xmltodict
+        sample = os.path.dirname(os.path.abspath(__file__)) + os.sep + default_data_model + ".architect"
+        with open(sample, "r") as file:
+            architect = xmltodict.parse(file.read())["architect-project"]
+        streamed = dict()
+        for kind, element in Architect().iterparse_architect(sample):
+            streamed.setdefault(kind, list()).append(element)
+        self.assertEqual(streamed["table"],        architect["target-database"]["table"])
+        self.assertEqual(streamed["relationship"], architect["target-database"]["relationships"]["relationship"])
+        self.assertEqual(streamed["table-link"],   architect["play-pen"]["table-link"])
+        Term.print_green("< testStreamArchitect")
+
+    def testIncremental(self):
+        Term.print_green("> testIncremental")
+        Term.setVerbose(False)
+        model = self.sample_model()
+        ctx = lets_do_it("openapi, render, incremental", GenerationContext(model))
+        yaml_file = ctx.output_dir + os.sep + default_data_model + ".yaml"
+        generated = FileSystem.loadFileContent(yaml_file)
+        self.assertEqual(ctx.build_cache.reused["tables"], 0)
+        # Tables read again from the .architect, the ModelCache is off by default
+        ctx = lets_do_it("openapi, render, incremental", GenerationContext(model))
+        self.assertEqual(ctx.build_cache.rebuilt["tables"], 0)
+        self.assertEqual(ctx.build_cache.rebuilt["paths"], 0)
+        self.assertGreater(ctx.build_cache.reused["tables"], 0)
+        self.assertEqual(FileSystem.loadFileContent(yaml_file), generated)
+        # Same OpenAPI : not dumped again
+        self.assertEqual((ctx.build_cache.reused["openapi"], ctx.build_cache.rebuilt["openapi"]), (1, 0))
+        # Cache of another script : ignored
+        cache_file = ctx.output_dir + os.sep + ctx.get_basename() + cache_file_suffix
+        cache = json.loads(FileSystem.loadFileContent(cache_file))
+        self.assertEqual(cache["script"], ModelCache.script_hash())
+        cache["script"] = "changed"
+        FileSystem.saveFileContent(json.dumps(cache), cache_file)
+        self.assertEqual(BuildCache(cache_file).load().previous["tables"], dict())
+        # Only what is the same once reloaded from JSON is cached
+        build_cache = BuildCache().start_run()
+        build_cache.put("tables", "T1", "h1", {"properties": {1: "int key"}})
+        build_cache.put("tables", "T2", "h2", {"properties": {"1": "str key"}})
+        self.assertEqual(list(build_cache.current["tables"].keys()), ["T2"])
+        Term.print_green("< testIncremental")
+
+    def testWatch(self):
+        Term.print_green("> testWatch")
+        Term.setVerbose(False)
+        model = self.sample_model()
+        ctx = GenerationContext(model)
+        FileSystem.createDir(ctx.input_dir)
+        template = ctx.input_dir + os.sep + "names_Template.txt.mako"
+        rendered = ctx.output_dir + os.sep + "names.txt"
+        FileSystem.saveFileContent("${' '.join(ENTITIES)}", template)
+        watcher = threading.Thread(target=lets_do_watch, args=("openapi, render",), daemon=True,
+                                   kwargs={"interval": 0.05, "debounce": 0.05, "ctx": ctx, "cycles": 2})
+        watcher.start()
+        def wait_for(condition):
+            deadline = time.time() + 30
+            while (not condition()) and (time.time() < deadline):
+                time.sleep(0.05)
+            self.assertTrue(condition())
+        wait_for(lambda: FileSystem.is_FileExist(rendered))
+        time.sleep(0.5)  # First generation done, watching
+        self.assertNotIn("UsagePolicySettings", FileSystem.loadFileContent(rendered))
+        # Model changed : generated again
+        architect = FileSystem.loadFileContent(model + ".architect")
+        FileSystem.saveFileContent(architect.replace('name="UsagePolicyConfiguration" objectType', 'name="UsagePolicySettings" objectType'), model + ".architect")
+        wait_for(lambda: "UsagePolicySettings" in FileSystem.loadFileContent(rendered))
+        time.sleep(0.5)
+        # Template changed : rendered again, from the model of the previous cycle
+        FileSystem.saveFileContent("${len(ENTITIES)} entities", template)
+        watcher.join(30)
+        self.assertFalse(watcher.is_alive())
+        self.assertEqual(FileSystem.loadFileContent(rendered), str(len(ctx.entities)) + " entities")
+        self.assertEqual((ctx.files_written, ctx.files_unchanged), (1, 0))
+        Term.print_green("< testWatch")
+
+    def testRemarks(self):
+        Term.print_green("> testRemarks")
+        text = "read-only <parameters><path_parameters>{}</path_parameters></parameters> <schema>a<schema>b</schema> c"
+        remarks = parse_remarks(text)
+        self.assertIs(remarks, parse_remarks(text))
+        for tag in ["schema", "parameters", "path_parameters", "get_parameters", "other"]:
+            self.assertEqual(remarks.find(tag),   find_between(text, "<" + tag + ">", "</" + tag + ">"))
+            self.assertEqual(remarks.remove(tag), remove_between(text, "<" + tag + ">", "</" + tag + ">"))
+        self.assertEqual(remarks.find("schema"), "ab")
+        self.assertEqual(parse_remarks(remarks.find("parameters")).find("path_parameters"), "{}")
+        Term.print_green("< testRemarks")
+
+    def testDecodeSchema(self):
+        Term.print_green("> testDecodeSchema")
+        text = "maxCardinality: 3\npossibleValues: [a, b]"
+        first = decode_schema(text)
+        first["possibleValues"].append("c")
+        self.assertEqual(decode_schema(text), {"maxCardinality": 3, "possibleValues": ["a", "b"]})
+        cache = BuildCache().start_run()
+        decode_schema(text, cache)
+        cache.start_run()
+        self.assertEqual(decode_schema(text, cache), {"maxCardinality": 3, "possibleValues": ["a", "b"]})
+        self.assertEqual(cache.reused["schemas"], 1)
+        # Schemas not used in the last KEPT_RUNS runs are dropped
+        for run in range(BuildCache.KEPT_RUNS - 1):
+            cache.start_run()
+        self.assertEqual(len(cache.kept("schemas")), 1)
+        cache.start_run()
+        self.assertEqual(cache.kept("schemas"), dict())
+        Term.print_green("< testDecodeSchema")
+
+    def testJsonSchemaBundle(self):
+        Term.print_green("> testJsonSchemaBundle")
+        def schema(name, properties):
+            return {"$schema": "http://json-schema.org/draft-07/schema", "$id": baseURI + name + ".json", "properties": properties}
+        schemas = {
+            "Root"  : schema("Root",  {"_ROOT": {}, "A": {"$ref": "#/$defs/A"}}),
+            "A"     : schema("A",     {"B": {"type": "array", "items": {"$ref": "#/$defs/B"}}}),
+            "B"     : schema("B",     {"name": {"type": "string"}}),
+            "C"     : schema("C",     {"name": {"type": "string"}}),
+            "Other" : schema("Other", {"_ROOT": {}, "C": {"$ref": "#/$defs/C"}})
+        }
+        before = json.dumps(schemas)
+        roots, shared = json_schema_bundle(schemas, "inline")
+        self.assertIsNone(shared)
+        self.assertEqual(list(roots.keys()), ["Root", "Other"])
+        self.assertEqual(list(roots["Root"]["$defs"].keys()), ["A", "B", "C", "Other"])
+        self.assertNotIn("_ROOT", roots["Root"]["properties"])
+        self.assertNotIn("$id", roots["Root"]["$defs"]["A"])
+        roots, shared = json_schema_bundle(schemas, "reachable")
+        self.assertEqual(list(roots["Root"]["$defs"].keys()), ["A", "B"])
+        self.assertEqual(list(roots["Other"]["$defs"].keys()), ["C"])
+        roots, shared = json_schema_bundle(schemas, "shared", "Model_Defs.json")
+        self.assertNotIn("$defs", roots["Root"])
+        self.assertEqual(roots["Root"]["properties"]["A"]["$ref"], "Model_Defs.json#/$defs/A")
+        self.assertEqual(shared["$id"], baseURI + "Model_Defs.json")
+        self.assertEqual(shared["$defs"]["A"]["properties"]["B"]["items"]["$ref"], "#/$defs/B")
+        self.assertEqual(json.dumps(schemas), before)
+        with self.assertRaises(ValueError):
+            json_schema_bundle(schemas, "nested")
+        # Shared : the root schema next to the model refers to the definitions in the output dir
+        Term.setVerbose(False)
+        ctx = lets_do_it("openapi", GenerationContext(self.sample_model()))
+        ctx.schema_defs = "shared"
+        ctx.entities["API"]["properties"]["_ROOT"] = dict(next(iter(ctx.entities["API"]["properties"].values())), name="_ROOT")
+        lets_do_json_schema(ctx)
+        schema = Term.json_load(FileSystem.loadFileContent(ctx.data_model + "_Schema.json"))
+        refs   = [ref for ref in re.findall('"\\$ref": "([^"]+)"', json.dumps(schema)) if (not ref.startswith("#"))]
+        self.assertTrue(refs)
+        for ref in refs:
+            defs_file, pointer = ref.split("#/$defs/")
+            defs = Term.json_load(FileSystem.loadFileContent(os.path.dirname(ctx.data_model) + os.sep + defs_file))
+            self.assertIn(pointer, defs["$defs"])
+        Term.print_green("< testJsonSchemaBundle")
+
+    def testEmitter(self):
+        Term.print_green("> testEmitter")
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        data = {"b": {"text": "Line\nwith a long description - " * 5, "list": [1, "two", None]}, "a": True}
+        Emitter.save_yaml(data, tmp.name + os.sep + "data.yaml")
+        self.assertEqual(Term.yaml_load(FileSystem.loadFileContent(tmp.name + os.sep + "data.yaml")), data)
+        self.assertEqual(list(Term.yaml_load(FileSystem.loadFileContent(tmp.name + os.sep + "data.yaml")).keys()), ["b", "a"])
+        Emitter.save_json(data, tmp.name + os.sep + "data.json")
+        self.assertEqual(FileSystem.loadFileContent(tmp.name + os.sep + "data.json"), json.dumps(data, indent=3))
+        Emitter.save_json(data, tmp.name + os.sep + "data.json", compact=True)
+        self.assertTrue(FileSystem.loadFileContent(tmp.name + os.sep + "data.json").startswith('{"b":{"text":'))
+        self.assertEqual(Term.json_load(FileSystem.loadFileContent(tmp.name + os.sep + "data.json")), data)
+        Term.print_green("< testEmitter")
+
+    def testProjections(self):
+        Term.print_green("> testProjections")
+        Term.setVerbose(False)
+        ctx = lets_do_it("openapi", GenerationContext(self.sample_model()))
+        entities = json.dumps(ctx.entities)
+        lets_do_openapi_yaml(ctx)
+        lets_do_json_schema(ctx)
+        lets_do_datastore(ctx, with_upload=False)
+        self.assertEqual(json.dumps(ctx.entities), entities)
+        for entity in ctx.openapi["components"]["schemas"].values():
+            self.assertFalse(set(entity.keys()) & set(ENTITY_INTERNAL_KEYS))
+        self.assertIn("TABLE", ctx.entities["API"])
+        Term.print_green("< testProjections")
+
+    def testDatastoreUpload(self):
+        Term.print_green("> testDatastoreUpload")
+        import http.server
+        received = list()
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                received.append((self.path, body))
+                # First post of each target fails, retried
+                status = 503 if ([path for path, _ in received].count(self.path) == 1) else 201
+                if ("/datastore/missings" in self.path): status = 404
+                if ("/datastore/brokens" in self.path): status = 500
+                self.send_response(status)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+            def log_message(self, format, *args):
+                pass
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        uploader = DatastoreUploader("http://127.0.0.1:" + str(server.server_address[1]) + "/", jobs=4, timeout=5, backoff=0.01)
+        targets  = [("Entity" + str(i), "entity" + str(i), {"title": "Entity" + str(i)}) for i in range(10)]
+        results  = uploader.upload(targets + [("Missing", "missing", {}), ("Broken", "broken", {})])
+        self.assertEqual([result["entity"] for result in results], [target[0] for target in targets] + ["Missing", "Broken"])
+        for result in results[:-2]:
+            self.assertEqual((result["status"], result["attempts"], result["error"]), (201, 2, None))
+        self.assertEqual((results[-2]["status"], results[-2]["attempts"]), (404, 1))
+        # 500 : the create may have been done, not retried
+        self.assertEqual((results[-1]["status"], results[-1]["attempts"]), (500, 1))
+        # Picklable for the batch processes
+        self.assertEqual(pickle.loads(pickle.dumps(uploader)).url("entity"), uploader.url("entity"))
+        self.assertIn(("/datastore/entity3s?create", {"title": "Entity3"}), received)
+        # Datastore stage posts the entity schemas
+        Term.setVerbose(False)
+        ctx = lets_do_it("openapi", GenerationContext(self.sample_model()))
+        ctx.datastore = uploader
+        del received[:]
+        lets_do_datastore(ctx)
+        posted = dict(received)
+        self.assertTrue(posted)
+        for path, schema in posted.items():
+            self.assertIsInstance(schema, dict)
+            self.assertIn("properties", schema)
+        # Connection dropped once the post was read : the create may be done, not retried
+        import socket
+        dropping = socket.socket()
+        dropping.bind(("127.0.0.1", 0))
+        dropping.listen(8)
+        self.addCleanup(dropping.close)
+        accepted = list()
+        def drop():
+            while (True):
+                try:
+                    connection, _ = dropping.accept()
+                except OSError:
+                    return
+                connection.recv(65536)
+                accepted.append(True)
+                connection.close()
+        threading.Thread(target=drop, daemon=True).start()
+        results = DatastoreUploader("http://127.0.0.1:" + str(dropping.getsockname()[1]), timeout=5, retries=3, backoff=0.01).upload([("Dropped", "dropped", {})])
+        self.assertEqual((results[0]["status"], results[0]["attempts"], len(accepted)), (None, 1, 1))
+        self.assertIn("ConnectionError", results[0]["error"])
+        # Unreachable datastore : retried, then reported
+        ctx.datastore = DatastoreUploader("http://127.0.0.1:1", timeout=1, retries=1, backoff=0.01)
+        self.assertEqual(ctx.datastore.upload([("Refused", "refused", {})])[0]["attempts"], 2)
+        with self.assertRaises(RuntimeError):
+            lets_do_datastore(ctx)
+        Term.print_green("< testDatastoreUpload")
+
+    def testModelCache(self):
+        Term.print_green("> testModelCache")
+        Term.setVerbose(False)
+        model = self.sample_model()
+        read = lets_do_it("openapi", GenerationContext(model))
+        cache_file = read.output_dir + os.sep + read.get_basename() + model_cache_suffix
+        key = ModelCache.key(model + ".architect")
+        # Off by default
+        self.assertFalse(os.path.exists(cache_file))
+        read = lets_do_it("openapi", GenerationContext(model).set_options({"model_cache": True}))
+        self.assertIsNotNone(ModelCache(cache_file).load(key))
+        cached = lets_do_it("openapi", GenerationContext(model).set_options({"model_cache": True}))
+        self.assertEqual(json.dumps(cached.entities), json.dumps(read.entities))
+        self.assertEqual(json.dumps(cached.openapi), json.dumps(read.openapi))
+        self.assertEqual(cached.model_index.find_table_contained("API"), read.model_index.find_table_contained("API"))
+        # Changed model : cache not valid any more
+        with open(model + ".architect", "a") as file:
+            file.write("\n")
+        self.assertNotEqual(ModelCache.key(model + ".architect"), key)
+        self.assertIsNone(ModelCache(cache_file).load(ModelCache.key(model + ".architect")))
+        FileSystem.saveFileContent("not a pickle", cache_file)
+        self.assertIsNone(ModelCache(cache_file).load(key))
+        # Key checked before the model is unpickled
+        FileSystem.saveFileContent(key + "\nnot a pickle", cache_file)
+        with self.assertLogs(logger, level="WARNING"):
+            self.assertIsNone(ModelCache(cache_file).load(key))
+        self.assertIsNone(ModelCache(cache_file).load(ModelCache.key(model + ".architect")))
+        Term.print_green("< testModelCache")
+
+    def testContextDumps(self):
+        Term.print_green("> testContextDumps")
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        context = {"DATAMODEL": "Model", "ENTITIES": {"User": {"type": "object"}}}
+        FileSystem.renderDir(tmp.name, tmp.name, context)
+        self.assertEqual(os.listdir(tmp.name), [])
+        cache = BuildCache().start_run()
+        FileSystem.renderDir(tmp.name, tmp.name, context, cache=cache, context_dumps=["yaml", "json"])
+        self.assertEqual(sorted(os.listdir(tmp.name)), ["Model_context.json", "Model_context.yaml"])
+        self.assertEqual(Term.json_load(FileSystem.loadFileContent(tmp.name + os.sep + "Model_context.json")), context)
+        # Same context : not saved again, changed context : saved
+        cache.start_run()
+        FileSystem.renderDir(tmp.name, tmp.name, context, cache=cache, context_dumps=["yaml", "json"])
+        self.assertEqual((cache.reused["context"], cache.rebuilt["context"]), (2, 0))
+        cache.start_run()
+        context["ENTITIES"]["User"]["type"] = "array"
+        FileSystem.renderDir(tmp.name, tmp.name, context, cache=cache, context_dumps=["json"])
+        self.assertEqual((cache.reused["context"], cache.rebuilt["context"]), (0, 1))
+        self.assertEqual(Term.json_load(FileSystem.loadFileContent(tmp.name + os.sep + "Model_context.json")), context)
+        Term.print_green("< testContextDumps")
+
+    def testWriteIfChanged(self):
+        Term.print_green("> testWriteIfChanged")
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        file_name = tmp.name + os.sep + "data.json"
+        written, unchanged = FileSystem.files_written, FileSystem.files_unchanged
+        self.assertTrue(Emitter.save_json({"a": 1}, file_name))
+        os.utime(file_name, (1000000000, 1000000000))
+        self.assertFalse(Emitter.save_json({"a": 1}, file_name))
+        self.assertEqual(os.stat(file_name).st_mtime, 1000000000)
+        self.assertTrue(FileSystem.saveFileContent('{"a": 2}', file_name))
+        self.assertEqual(FileSystem.loadFileContent(file_name), '{"a": 2}')
+        self.assertEqual((FileSystem.files_written - written, FileSystem.files_unchanged - unchanged), (2, 1))
+        # Failed write : previous content kept, no temporary file left
+        def failing(file):
+            file.write("partial")
+            raise IOError("Disk Full")
+        with self.assertRaises(IOError):
+            FileSystem.writeFile(file_name, failing)
+        self.assertEqual(FileSystem.loadFileContent(file_name), '{"a": 2}')
+        self.assertEqual(os.listdir(tmp.name), ["data.json"])
+        # Counted on the context of each thread
+        def counting(ctx, index):
+            with FileSystem.countingFiles(ctx):
+                for i in range(20):
+                    FileSystem.saveFileContent(str(i // 2), tmp.name + os.sep + "file" + str(index) + ".txt")
+        contexts = [GenerationContext(self.sample_model()) for index in range(4)]
+        threads  = [threading.Thread(target=counting, args=(ctx, index)) for index, ctx in enumerate(contexts)]
+        for thread in threads: thread.start()
+        for thread in threads: thread.join()
+        self.assertEqual([(ctx.files_written, ctx.files_unchanged) for ctx in contexts], [(10, 10)] * 4)
+        Term.print_green("< testWriteIfChanged")
+
+    def testOpenapiSplit(self):
+        Term.print_green("> testOpenapiSplit")
+        Term.setVerbose(False)
+        ctx = GenerationContext(self.sample_model())
+        ctx.openapi_split = True
+        lets_do_it("openapi", ctx)
+        root_file = ctx.output_dir + os.sep + ctx.get_basename() + ".yaml"
+        root = Term.yaml_load(FileSystem.loadFileContent(root_file))
+        self.assertEqual(list(root["paths"].keys()), list(ctx.openapi["paths"].keys()))
+        for path, path_ref in root["paths"].items():
+            part_file, pointer = path_ref["$ref"].split("#/")
+            part = Term.yaml_load(FileSystem.loadFileContent(ctx.output_dir + os.sep + part_file))
+            self.assertIn(urllib.parse.unquote(pointer).replace("~1", "/").replace("~0", "~"), part)
+        for name, schema_ref in root["components"]["schemas"].items():
+            schema = Term.yaml_load(FileSystem.loadFileContent(ctx.output_dir + os.sep + schema_ref["$ref"]))
+            self.assertNotIn("#/components/schemas/", json.dumps(schema))
+        # Unchanged parts are not written again, parts not generated any more are removed
+        stale = ctx.output_dir + os.sep + ctx.get_basename() + openapi_parts_suffix + os.sep + "schemas" + os.sep + "Removed.yaml"
+        parts = glob.glob(ctx.output_dir + os.sep + "**" + os.sep + "*.yaml", recursive=True)
+        mtimes = {file_name: os.stat(file_name).st_mtime_ns for file_name in parts}
+        FileSystem.saveFileContent("type: object", stale)
+        lets_do_it("openapi", ctx)
+        self.assertEqual({file_name: os.stat(file_name).st_mtime_ns for file_name in parts}, mtimes)
+        self.assertFalse(os.path.exists(stale))
+        # A "paths" prefix does not collide with the paths without prefix
+        self.assertEqual(openapi_path_group(["paths"], "/paths/a"), "paths")
+        self.assertEqual(openapi_path_group(["paths"], "/other/b"), openapi_default_group)
+        Term.print_green("< testOpenapiSplit")
+
+    def testDatastoreSchemas(self):
+        Term.print_green("> testDatastoreSchemas")
+        ctx = GenerationContext("Model")
+        def entity(relations, path=None):
+            entity_desc = {"properties": {name: {"$ref": "#/components/schemas/" + name} for name in relations},
+                           "RELATIONS": {name: {"TableContained": name, "Cardinalite": card} for name, card in relations.items()}}
+            if (path): entity_desc["PATH"] = path
+            return entity_desc
+        ctx.entities = {"P": entity({"I": "ZeroToOne", "Q": "OneToMore"}, "p"), "Q": entity({}, "q"),
+                        "I": entity({"J": "OneToMore"}), "J": entity({"I": "OneToOne"})}
+        ctx.links    = {str(i): {"TableContaining": containing, "TableContained": contained}
+                        for i, (containing, contained) in enumerate([("P", "I"), ("P", "Q"), ("I", "J"), ("J", "I"), ("P", "I")])}
+        self.assertEqual(containment_graph(ctx, ctx.entities), {"P": [("Q", "OneToMore"), ("I", "ZeroToOne")], "I": [("J", "OneToMore")], "J": [("I", "OneToOne")]})
+        entities = json.dumps(ctx.entities)
+        schemas  = datastore_schemas(ctx, ctx.entities)
+        self.assertEqual(list(schemas.keys()), ["P", "Q"])
+        self.assertEqual(schemas["P"]["properties"]["I"], {"$ref": "#/$defs/I"})
+        self.assertEqual(schemas["P"]["properties"]["Q"], {"$ref": "#/components/schemas/Q", "type": "array", "items": {"$ref": "Model_Q_Schema.json"}})
+        self.assertEqual(list(schemas["P"]["$defs"].keys()), ["I", "J"])
+        self.assertEqual(schemas["P"]["$defs"]["J"]["properties"]["I"], {"$ref": "#/$defs/I"})
+        self.assertNotIn("$defs", schemas["Q"])
+        self.assertEqual(json.dumps(ctx.entities), entities)
+        Term.print_green("< testDatastoreSchemas")
+
+    def testLeanStartup(self):
+        Term.print_green("> testLeanStartup")
+        # Modules of the stages which need them only, not loaded by an openapi run
+        script = os.path.dirname(os.path.abspath(__file__))
+        code   = "import sys; sys.path.insert(0, sys.argv[1]); import data_model_to_openapi"
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", code, script], capture_output=True, text=True, cwd=tempfile.gettempdir())
+        self.assertEqual(result.returncode, 0, result.stderr)
+        imported = dict()  # Module -> cumulative import time (us)
+        for line in result.stderr.splitlines():
+            if (line.startswith("import time:")) and (line.split("|")[1].strip().isdigit()):
+                imported[line.split("|")[-1].strip()] = int(line.split("|")[1])
+        for module in ["mako", "requests", "xmltodict", "jsonschema", "markdown", "dicttoxml", "jsonpath_ng", "unittest", "unidecode"]:
+            self.assertNotIn(module, imported)
+        # The lazy modules above take longer than this budget to import on their own
+        self.assertLess(imported["data_model_to_openapi"], 250000)
+        Term.print_green("< testLeanStartup")
+
+    def testProfile(self):
+        Term.print_green("> testProfile")
+        Term.setVerbose(False)
+        ctx = GenerationContext(self.sample_model())
+        FileSystem.createDir(ctx.input_dir)
+        FileSystem.saveFileContent("${DATAMODEL}", ctx.input_dir + os.sep + "name_Template.txt.mako")
+        ctx.profiler = Profiler()
+        lets_do_it("openapi, render", ctx)
+        stages = {stage[0]: stage for stage in ctx.profiler.stages}
+        self.assertEqual(list(stages.keys()), ["read_architect", "parse & collect_tables", "collect_links", "resolve_relations",
+                                               "lets_do_openapi_yaml", "lets_do_render"])
+        self.assertEqual(stages["collect_links"][1], 1)
+        self.assertGreaterEqual(stages["read_architect"][4], stages["parse & collect_tables"][4])
+        self.assertEqual(list(ctx.profiler.templates.keys()), ["name_Template.txt.mako"])
+        self.assertFalse(tracemalloc.is_tracing())
+        # Tracing started by the caller is not stopped
+        tracemalloc.start()
+        self.addCleanup(tracemalloc.stop)
+        lets_do_it("openapi", ctx)
+        self.assertTrue(tracemalloc.is_tracing())
+        Term.print_green("< testProfile")
+
+    def testLogging(self):
+        Term.print_green("> testLogging")
+        Term.setVerbose(False)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.addCleanup(Term.setLogging, "off")
+        log_file  = tmp.name + os.sep + "test.log"
+        evaluated = list()
+        def dump():
+            evaluated.append(True)
+            return "Dump"
+        # Lazy messages are not evaluated when neither printed nor logged
+        Term.setLogging("warning", log_file)
+        Term.print_verbose(dump)
+        self.assertEqual(evaluated, [])
+        self.assertFalse(os.path.exists(log_file))
+        Term.print_warning(lambda: "Warning Logged")
+        set_default("attribute", dict(), "type", "string")
+        Term.setLogging("debug", log_file + ".debug")
+        Term.print_verbose(dump)
+        self.assertEqual(evaluated, [True])
+        Term.setLogging("off")
+        Term.print_warning(dump)
+        self.assertEqual(evaluated, [True])
+        self.assertIn("Warning Logged", FileSystem.loadFileContent(log_file))
+        self.assertNotIn("defaulted to", FileSystem.loadFileContent(log_file))
+        self.assertIn("DEBUG - Dump", FileSystem.loadFileContent(log_file + ".debug"))
+        with self.assertRaises(ValueError):
+            Term.setLogging("verbose")
+        # Settings passed to the worker processes, the worker log is appended
+        Term.setLogging("info", log_file)
+        settings = Term.getSettings()
+        self.assertEqual(settings, {"verbose": False, "log_level": "info", "log_file": log_file})
+        self.addCleanup(setattr, FileSystem, "templates_modules_dir", FileSystem.templates_modules_dir)
+        Term.setLogging("off")
+        FileSystem.renderInit({"DATAMODEL": "Model"}, tmp.name, settings)
+        self.assertEqual((FileSystem.templates_modules_dir, Term.getSettings()), (tmp.name, settings))
+        Term.print_warning("Worker Warning")
+        self.assertIn("Warning Logged", FileSystem.loadFileContent(log_file))
+        self.assertIn("Worker Warning", FileSystem.loadFileContent(log_file))
+        Term.print_green("< testLogging")
+
+    def testCreatePath(self):
+        Term.print_green("> testCreatePath")
+        entity = {"PATH": "user", "PATH_PREFIX": "/v1", "PATH_OPERATION": "read-write",
+                  "PATH_PARAMETERS": "<path_parameters>{\"name\": \"${table}Tenant\", \"in\": \"query\"}</path_parameters>"
+                                     "<list_parameters>{\"name\": \"limit\", \"in\": \"query\"}</list_parameters>"}
+        paths = create_path({"User": entity}, dict())
+        self.assertEqual(list(paths.keys()), ["/v1/users", "/v1/users/{userId}"])
+        self.assertEqual(list(paths["/v1/users"].keys()), ["summary", "description", "get", "post", "parameters"])
+        self.assertEqual(paths["/v1/users"]["parameters"], [{"name": "userTenant", "in": "query"}])
+        self.assertEqual(paths["/v1/users"]["get"]["parameters"], [{"name": "limit", "in": "query"}])
+        self.assertEqual([param["name"] for param in paths["/v1/users/{userId}"]["parameters"]], ["userId", "userTenant"])
+        self.assertEqual(sorted(paths["/v1/users/{userId}"].keys()), ["delete", "description", "get", "parameters", "put", "summary"])
+        entity["PATH_PARAMETERS"] = "<get_parameters>{\"name\": </get_parameters>"
+        with self.assertRaises(ValueError) as raised:
+            create_path({"User": entity}, dict())
+        self.assertIn("<get_parameters> of [User]", str(raised.exception))
+        Term.print_green("< testCreatePath")
+
+    def testTemplateCache(self):
+        Term.print_green("> testTemplateCache")
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        template_file = tmp.name + os.sep + "hello.txt.mako"
+        FileSystem.saveFileContent("Hello ${name}", template_file)
+        first  = FileSystem.getTemplate(template_file)
+        self.assertIs(first, FileSystem.getTemplate(template_file))
+        self.assertEqual(first.render(name="World"), "Hello World")
+        # Changed template is compiled again
+        FileSystem.saveFileContent("Bye ${name}, see you", template_file)
+        second = FileSystem.getTemplate(template_file)
+        self.assertIsNot(first, second)
+        self.assertEqual(second.render(name="World"), "Bye World, see you")
+        Term.print_green("< testTemplateCache")
+
+    def testRenderDirParallel(self):
+        Term.print_green("> testRenderDirParallel")
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        templates_dir = tmp.name + os.sep + "templates"
+        FileSystem.createDir(templates_dir)
+        for i in range(4):
+            FileSystem.saveFileContent("${DATAMODEL} " + str(i), templates_dir + os.sep + "t" + str(i) + "_Template.txt.mako")
+        FileSystem.saveFileContent("${DATAMODEL.missing}", templates_dir + os.sep + "bad_Template.txt.mako")
+        with self.assertRaises(RuntimeError) as raised:
+            FileSystem.renderDir(templates_dir, tmp.name, {"DATAMODEL": "Model"}, jobs=3)
+        self.assertIn("bad_Template.txt.mako", str(raised.exception))
+        for i in range(4):
+            self.assertEqual(FileSystem.loadFileContent(tmp.name + os.sep + "t" + str(i) + ".txt"), "Model " + str(i))
+        Term.print_green("< testRenderDirParallel")
+
+    def testBatch(self):
+        Term.print_green("> testBatch")
+        Term.setVerbose(False)
+        model = self.sample_model()
+        other = os.path.dirname(model) + os.sep + "Other"
+        shutil.copy(model + ".architect", other + ".architect")
+        models = batch_models([os.path.dirname(model) + os.sep + "*.architect", other + ", Missing"])
+        self.assertEqual(models, [model, other, "Missing"])
+        results = lets_do_batch(models, "openapi", jobs=2)
+        self.assertEqual([result["model"] for result in results], models)
+        self.assertIsNone(results[0]["error"])
+        self.assertIsNone(results[1]["error"])
+        self.assertIn("Model not found", results[2]["error"])
+        self.assertTrue(FileSystem.is_FileExist(other + output_dir_suffix + os.sep + "Other.yaml"))
+        # Options applied to each model
+        results = lets_do_batch([model, other], "openapi, render", jobs=2, options={"context_dumps": ["json"], "openapi_split": True})
+        self.assertEqual([result["error"] for result in results], [None, None])
+        for output in [model + output_dir_suffix + os.sep + default_data_model, other + output_dir_suffix + os.sep + "Other"]:
+            self.assertTrue(FileSystem.is_FileExist(output + "_context.json"))
+            self.assertTrue(os.path.isdir(output + openapi_parts_suffix))
+        with self.assertRaises(ValueError):
+            GenerationContext(model).set_options({"jobs": 2})
+        Term.print_green("< testBatch")
+
+    def testConcurrentGenerations(self):
+        Term.print_green("> testConcurrentGenerations")
+        Term.setVerbose(False)
+        model = self.sample_model()
+        other = os.path.dirname(model) + os.sep + "Other"
+        shutil.copy(model + ".architect", other + ".architect")
+        serial = lets_do_it("openapi, schema", GenerationContext(model))
+        expected = FileSystem.loadFileContent(serial.output_dir + os.sep + default_data_model + ".yaml")
+        results = lets_do_batch([model, other] * 2, "openapi, schema", jobs=4, threads=True)
+        self.assertEqual([result["error"] for result in results], [None] * 4)
+        self.assertEqual(FileSystem.loadFileContent(serial.output_dir + os.sep + default_data_model + ".yaml"), expected)
+        self.assertEqual(FileSystem.loadFileContent(other + output_dir_suffix + os.sep + "Other.yaml"), expected)
+        Term.print_green("< testConcurrentGenerations")
+
     def testGenerateNEFConfigurationSchema(self):
         Term.setVerbose(False)
         lets_do_it("Nef"+os.sep+"NEF_Configuration", "schema")
@@ -1803,10 +3672,138 @@ class Test(unittest.TestCase):
         # lets_do_it("Nef"+os.sep+"NEF_Catalog_DataModel", "openapi + schema + datastore + render")
 
 
+usage = """
+Usage: python data_model_to_openapi.py [options] [<data_model>] [<what>]
+
+    <data_model>       : Model path, without .architect extension (default: """ + default_data_model + """)
+    <what>             : Generation stages : openapi, schema, datastore, render (default: "openapi, render")
+
+    -i, --incremental  : Only rebuild what changed since the previous run (cache in <data_model>_artifacts)
+    -w, --watch        : Keep running, generate again when the model or templates change
+    -b, --batch <models> : Generate several models in parallel - list or glob, e.g. "models/*.architect"
+                           Then <what> is the only argument
+    -j, --jobs <N>     : Number of parallel processes - models in batch mode (default: one per core),
+                         templates otherwise (default: 1)
+    --templates-modules <dir> : Keep compiled templates in <dir>, across runs
+    --compact-json     : JSON schemas & context without indentation
+    --model-cache      : Keep the model read in <data_model>_artifacts, loaded while the .architect is unchanged (trusted dir only)
+    --context <formats> : Save the rendering context in these formats : yaml, json or "yaml, json" (default: none)
+    --openapi-split    : OpenAPI as a root <data_model>.yaml referring to a file per schema & per path group (PATH_PREFIX)
+                         in <data_model>_openapi/ - only changed files are written
+    --schema-defs <mode> : $defs of the root JSON schemas : inline (default), reachable (only the definitions used),
+                           shared (one <data_model>_Defs.json referenced by the roots)
+    --datastore-url <url> : Datastore base URL (default: """ + default_datastore_url + """)
+    --datastore-jobs <N> : Schemas uploaded in parallel (default: 8)
+    --datastore-retries <N> : Retries of an upload not connected, or answered 429 or 503, with exponential backoff (default: 3)
+    --datastore-insecure : Do not verify the datastore TLS certificate
+    --profile          : Report time, CPU & peak memory of each stage, and the slowest templates
+    --profile-stats <file> : Also save the cProfile stats of the run in <file>
+    --log-level <level> : debug, info, warning, error or off (default: warning)
+    --log-file <file>  : Log file (default: """ + logFile + """)
+    -v, --verbose      : Verbose output
+    -h, --help         : This help
+"""
+
+
 if __name__ == '__main__':
     what = "openapi, render"
-    if (len(sys.argv) >= 2):
-        data_model = sys.argv[1]
-    if (len(sys.argv) >= 3):
-        what = sys.argv[2]
-    lets_do_it(what)
+    try:
+        opts, args = getopt.gnu_getopt(sys.argv[1:], "hivwb:j:", ["help", "incremental", "verbose", "watch", "batch=", "jobs=", "templates-modules=", "compact-json", "profile", "profile-stats=", "log-level=", "log-file=", "model-cache", "no-model-cache", "context=", "openapi-split", "schema-defs=", "datastore-url=", "datastore-jobs=", "datastore-retries=", "datastore-insecure"])
+    except getopt.GetoptError as ex:
+        Term.print_error(str(ex))
+        print(usage)
+        sys.exit(2)
+    incremental = False
+    watch       = False
+    batch       = list()
+    jobs        = None
+    compact_json = False
+    schema_defs = "inline"
+    openapi_split = False
+    context_dumps = list()
+    model_cache = False
+    datastore   = DatastoreUploader()
+    profiler    = None
+    log_level   = "warning"
+    log_file    = logFile
+    for opt, arg in opts:
+        if opt in ("-h", "--help"):
+            print(usage)
+            sys.exit(0)
+        elif opt in ("-i", "--incremental"):
+            incremental = True
+        elif opt in ("-v", "--verbose"):
+            Term.setVerbose(True)
+        elif opt in ("-w", "--watch"):
+            watch = True
+        elif opt in ("-b", "--batch"):
+            batch.append(arg)
+        elif opt in ("-j", "--jobs"):
+            jobs = int(arg)
+        elif opt in ("--templates-modules",):
+            FileSystem.templates_modules_dir = arg
+        elif opt in ("--compact-json",):
+            compact_json = True
+        elif opt in ("--model-cache",):
+            model_cache = True
+        elif opt in ("--no-model-cache",):  # Default, kept for the existing scripts
+            model_cache = False
+        elif opt in ("--context",):
+            context_dumps = [context_dump.strip().lower() for context_dump in arg.split(",") if (context_dump.strip())]
+            if ([context_dump for context_dump in context_dumps if (context_dump not in CONTEXT_DUMPS)]):
+                Term.print_error("Invalid context format [" + arg + "], expected : " + ", ".join(CONTEXT_DUMPS))
+                print(usage)
+                sys.exit(2)
+        elif opt in ("--openapi-split",):
+            openapi_split = True
+        elif opt in ("--schema-defs",):
+            if (arg not in SCHEMA_DEFS_MODES):
+                Term.print_error("Invalid $defs mode [" + arg + "], expected one of : " + ", ".join(SCHEMA_DEFS_MODES))
+                print(usage)
+                sys.exit(2)
+            schema_defs = arg
+        elif opt in ("--datastore-url",):
+            datastore.base_url = arg.rstrip("/")
+        elif opt in ("--datastore-jobs",):
+            datastore.jobs = max(1, int(arg))
+        elif opt in ("--datastore-retries",):
+            datastore.retries = int(arg)
+        elif opt in ("--datastore-insecure",):
+            datastore.verify = False
+        elif opt in ("--profile",):
+            profiler = profiler if (profiler) else Profiler()
+        elif opt in ("--profile-stats",):
+            profiler = Profiler(arg)
+        elif opt in ("--log-level",):
+            log_level = arg.lower()
+        elif opt in ("--log-file",):
+            log_file = arg
+    try:
+        Term.setLogging(log_level, log_file)
+    except ValueError as ex:
+        Term.print_error(str(ex))
+        print(usage)
+        sys.exit(2)
+    if (batch):
+        if (len(args) >= 1):
+            what = args[0]
+    else:
+        if (len(args) >= 1):
+            data_model = args[0]
+        if (len(args) >= 2):
+            what = args[1]
+    if (incremental):
+        what = what + ", incremental"
+    # Same options for a model, or for each model of a batch
+    options = {"compact_json": compact_json, "schema_defs": schema_defs, "openapi_split": openapi_split,
+               "context_dumps": context_dumps, "model_cache": model_cache, "datastore": datastore}
+    if (batch):
+        results = lets_do_batch(batch_models(batch), what, jobs, options=options)
+        sys.exit(1 if [result for result in results if result["error"]] else 0)
+    ctx = GenerationContext(data_model).set_options(options)
+    ctx.render_jobs  = jobs if (jobs) else 1
+    ctx.profiler     = profiler
+    if (watch):
+        lets_do_watch(what, ctx=ctx)
+    else:
+        lets_do_it(what, ctx)